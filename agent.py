@@ -1,5 +1,10 @@
 import os
+import re
+import ast
 import json
+import functools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from utils import count_tokens
 from llm import LLM
 from caller import Caller
@@ -12,6 +17,12 @@ from prompts.system import get_system_prompt
 from prompts.tooluse import TOOLUSE_PROMPT
 from utils import detect_language
 
+# Start of a tool call written out directly in a plan, e.g. `Command: bash_shell("ls")`
+_TOOL_CALL_START_RE = re.compile(
+    r'\b(code_browser_source|debugger|run_script|bash_shell|radare2|exploit_successful)\s*\('
+)
+# A plan line announcing the tool to run, e.g. `**Command:** bash_shell("ls")`
+_COMMAND_LINE_RE = re.compile(r'^\W*command\b', re.IGNORECASE)
 
 class Agent:
     """
@@ -30,9 +41,13 @@ class Agent:
         keep_history: Number of conversation items to maintain in context
         initial_data: Initial code/data to analyze
         history: List of conversation items between agent and LLM
+        caller: Tool dispatcher reused across loop iterations
         SYSTEM_PROMPT: System prompt template for the LLM
     """
 
+    # Minimum number of messages added since the last summary before summarizing again
+    SUMMARY_MIN_NEW_MESSAGES = 4
+
     def __init__(self, file: str, initial_data: str, is_binary: bool, llm_model: str = "o3-mini", 
                  provider: str = "openai", keep_history: int = 10):
         """
@@ -51,7 +66,8 @@ class Agent:
         logger.info(f"{Fore.CYAN}Detected language: {self.language}")
         
         # Initialize LLM with provider
-        self.llm = LLM(model=llm_model, provider=provider)
+        self.llm = LLM(model=llm_model, provider=provider, cache_key="agent")
+        self.llm.warm_up()  # connect while the binary is being built
         self.file = file
         self.llm_model = llm_model
         self.provider = provider
@@ -70,39 +86,136 @@ class Agent:
             {"role": "user", "content": f"Binary path: {self.binary_path}"}
         ]
         
+        # Reuse one set of tools across iterations so their caches survive
+        self.caller = Caller(file=self.file, llm_model=self.llm_model, provider=self.provider)
+        # Background worker for local bookkeeping that can overlap LLM round-trips
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.summarizer = Summarizer(self.llm_model)
+        # History length right after the last summary, so summaries are batched
+        self._last_summary_len = 0
+        # Per-agent memo of plan -> extracted command, so repeated plans skip the LLM
+        self._extract_tool_command = functools.lru_cache(maxsize=256)(self._extract_tool_command_llm)
+
         # Get language-specific system prompt
         self.SYSTEM_PROMPT = get_system_prompt(
             language=self.language,
             file=self.file,
             binary_path=self.binary_path
         )
+
+        # Invariant start of every request: system prompt plus the first two history items.
+        # Never mutated, so providers can reuse the cached prefix across iterations.
+        self._cached_prefix = [{"role": "system", "content": self.SYSTEM_PROMPT}] + self.history[:2]
         
-    def tool_use(self, response: str) -> str:
+    @staticmethod
+    def _find_tool_call(response: str):
         """
-        Process LLM response to extract tool commands.
+        Find the tool call written out on a plan's `Command:` line.
 
-        Args:
-            response: Raw LLM response string
+        Calls only mentioned in the plan's prose are ignored, and exploit_successful is
+        always left to the extraction LLM, so a stray mention can never end the run.
 
         Returns:
-            Extracted tool command string
+            The call text if exactly one command line names a tool and it holds a single,
+            single-line, syntactically valid call; otherwise None (e.g. a run_script call
+            whose triple-quoted script spans lines), so the caller falls back to the extraction LLM
         """
+        found = None
+        for line in response.splitlines():
+            if not _COMMAND_LINE_RE.match(line):
+                continue
+            match = _TOOL_CALL_START_RE.search(line)
+            if match is None:
+                continue
+            if found is not None or match.group(1) == 'exploit_successful':
+                return None
+            call = line[match.start():]
+            # Try the longest candidate first so nested parentheses stay inside the call
+            end = call.rfind(')')
+            while end != -1:
+                candidate = call[:end + 1]
+                try:
+                    if isinstance(ast.parse(candidate, mode='eval').body, ast.Call):
+                        break
+                except SyntaxError:
+                    pass
+                end = call.rfind(')', 0, end)
+            # Unparseable (usually continued on later lines) or a second call on the line
+            if end == -1 or _TOOL_CALL_START_RE.search(call, end + 1):
+                return None
+            found = candidate
+        return found
+
+    def _stream_plan(self, messages):
+        """
+        Stream the next plan and stop as soon as it names the tool to run.
+
+        Each finished line is checked; a `Command:` line holding a single valid tool call
+        ends the stream early.
+
+        Returns:
+            Tuple of (plan text received, tool command or None if none was seen)
+        """
+        buffer = ""
+        scanned = 0
+        stream = self.llm.stream(messages, temperature=0.3, reasoning="medium",
+                                 cache_prefix=len(self._cached_prefix))
+        try:
+            for chunk in stream:
+                buffer += chunk
+                while True:
+                    line_end = buffer.find('\n', scanned)
+                    if line_end == -1:
+                        break
+                    line = buffer[scanned:line_end]
+                    scanned = line_end + 1
+                    if _COMMAND_LINE_RE.match(line):
+                        tool_command = self._find_tool_call(line)
+                        if tool_command is not None:
+                            return buffer[:line_end], tool_command
+        finally:
+            stream.close()
+        return buffer, None
+
+    def _extract_tool_command_llm(self, response: str) -> str:
+        """Ask the LLM to pull the tool command out of a plan."""
         response = self.llm.prompt(TOOLUSE_PROMPT.format(
             response=response,
             file=self.file,
             binary_path=self.binary_path
         ))
         return response.strip('```')
+
+    def tool_use(self, response: str) -> str:
+        """
+        Process LLM response to extract tool commands.
+
+        A single well-formed call on the plan's `Command:` line is used directly;
+        otherwise the extraction LLM is asked, with results memoized per plan.
+
+        Args:
+            response: Raw LLM response string
+
+        Returns:
+            Extracted tool command string
+        """
+        tool_command = self._find_tool_call(response)
+        if tool_command is not None:
+            return tool_command
+        return self._extract_tool_command(response)
         
     def build_binary(self) -> str:
         """
         Compile source code into binary with security mitigations disabled.
 
+        A failed build, or a host without the go toolchain, is logged and the output path
+        is still returned, so the agent can build it itself via bash.
+
         Returns:
             Path to compiled binary
 
         Raises:
-            SystemExit: If compilation fails
+            SystemExit: On unexpected errors preparing the build
         """
         try:
             directory = os.path.dirname(self.file)
@@ -112,7 +225,16 @@ class Agent:
             # logger.info(f"g++ -std=c++17 -g {self.file} -o {output} -fno-stack-protector -z execstack -no-pie -w")
             logger.info(f"go build -o {output} {self.file}")
             # os.system(f"g++ -std=c++17 -g {self.file} -o {output} -fno-stack-protector -z execstack -no-pie -w")
-            os.system(f"go build -o {output} {self.file}")
+            try:
+                result = subprocess.run(["go", "build", "-o", output, self.file],
+                                        capture_output=True, text=True, check=False)
+            except OSError as e:
+                # e.g. go not installed; os.system just printed the shell error and carried on
+                logger.error(f"Build failed: {e}")
+                return output
+            if result.returncode != 0:
+                # Keep going like before; the agent can still build it itself via bash
+                logger.error(f"Build failed: {result.stderr.strip()}")
             return output
         except Exception as e:
             logger.error(f"Error compiling binary: {e}")
@@ -128,39 +250,44 @@ class Agent:
         4. Generates report on successful exploit
         """
         while True:
-            messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
-
-            # Rebuild binary in case it was deleted
+            # Rebuild binary only if it was deleted or the source changed
             if not self.is_binary:
-                self.build_binary()
+                if (not os.path.exists(self.binary_path)
+                        or os.path.getmtime(self.file) > os.path.getmtime(self.binary_path)):
+                    self.build_binary()
             
-            # Manage conversation history
-            if len(self.history) > self.keep_history:
+            # Manage conversation history; let a few messages pile up between summaries
+            # rather than paying a summarizer round-trip on every iteration
+            if (len(self.history) > self.keep_history
+                    and len(self.history) - self._last_summary_len >= self.SUMMARY_MIN_NEW_MESSAGES):
                 keep_beginning = 4
                 keep_ending = self.keep_history - keep_beginning
                 
                 first_messages = self.history[:keep_beginning]
                 last_messages = self.history[-keep_ending:]
                 middle_messages = self.history[keep_beginning:-keep_ending]
-                summary = Summarizer(self.llm_model).summarize_conversation(middle_messages)
+
+                summary = self.summarizer.summarize_conversation(middle_messages)
                 self.history = first_messages + [
                     {"role": "assistant", "content": f"[SUMMARY OF PREVIOUS CONVERSATION: {summary}]"}
                 ] + last_messages
-                
-                messages.extend(self.history)
-            else:
-                messages.extend(self.history)
+                self._last_summary_len = len(self.history)
+
+            # The first two history items are already part of the cached prefix
+            messages = self._cached_prefix + self.history[2:]
 
-            tokens = count_tokens(messages)
-            logger.info(f"{Fore.YELLOW}Tokens in context: ~{tokens:,}")
+            # Count tokens in the background while the plan request is in flight
+            tokens_future = self._executor.submit(count_tokens, messages)
 
-            # Get next action from LLM
-            response = self.llm.action(messages, temperature=0.3, reasoning="medium")
+            # Get next action from LLM, stopping early once it names the tool to run
+            response, tool_command = self._stream_plan(messages)
+            logger.info(f"{Fore.YELLOW}Tokens in context: ~{tokens_future.result():,}")
             logger.info(f"{Fore.YELLOW}Plan: {response}")
             self.history.append({"role": "assistant", "content": response})
             
             # Execute tool command
-            tool_command = self.tool_use(response)
+            if tool_command is None:
+                tool_command = self.tool_use(response)
 
             if "exploit_successful" in tool_command:
                 logger.info(f"{Fore.GREEN}Exploit successful, generating report")
@@ -168,5 +295,5 @@ class Agent:
                 report.generate_summary_report(self.history)
                 raise SystemExit(0)
             
-            tool_response = Caller(file=self.file, llm_model=self.llm_model, provider=self.provider).call_tool(tool_command)
+            tool_response = self.caller.call_tool(tool_command)
             self.history.append({"role": "user", "content": str(tool_response)})
\ No newline at end of file
@@ -1,4 +1,6 @@
 import os
+import ast
+import operator
 import subprocess
 from scripter import ScriptRunner
 from code_browser import CodeBrowser
@@ -6,8 +8,13 @@ from debugger import Debugger
 from utils import sanitize_command
 from logger import logger
 from colorama import Fore, Style, init
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple, List
 from radare2 import R2
+
+# Operators allowed between literal arguments, e.g. payloads like "A" * 40 + "B"
+_ARG_BINOPS = {ast.Add: operator.add, ast.Mult: operator.mul}
+
+
 class Caller:
     """
     A class that handles tool execution and command routing.
@@ -37,6 +44,86 @@ class Caller:
         self.script_runner = ScriptRunner(llm_model)
         self.debugger = Debugger()
         self.r2 = R2()
+
+        # Tool name -> handler, built once instead of on every call
+        self._tool_table = {
+            "code_browser_source": self._tool_code_browser_source,
+            "debugger": self._tool_debugger,
+            "run_script": self._tool_run_script,
+            "exploit_successful": self._tool_exploit_successful,
+            "bash_shell": self._tool_bash_shell,
+            "radare2": self._tool_r2,
+        }
+
+    def _tool_code_browser_source(self, file_name: str, function_name: str) -> str:
+        """Browse source code and extract function definitions."""
+        if "::" in function_name:
+            function_name = function_name.split("::")[1]
+        return self.code_browser.code_browser_source(file_name, function_name)
+
+    def _tool_debugger(self, filename: str, line_number: int, exprs: str,
+                       input_vars: Optional[Dict] = None) -> str:
+        """Execute debugger at specified location."""
+        return self.debugger.debug(filename, line_number, exprs, input_vars)
+
+    def _tool_r2(self, filename: str, commands: str|list[str], output_format = 'text') -> str:
+        """Execute radare2 with specified analysis."""
+        return self.r2.execute(filename,commands,output_format)
+
+    def _tool_run_script(self, script_code: str) -> str:
+        """Execute a script against target file."""
+        return self.script_runner.run_script(self.file, script_code)
+
+    def _tool_bash_shell(self, command: str) -> str:
+        """Execute a shell command semi-safely."""
+        cmd = sanitize_command(command)
+        try:
+            output = subprocess.run(cmd, shell=True, text=True, 
+                                 capture_output=True, check=False)
+            return f"{output.stdout}{output.stderr}"
+        except Exception as e:
+            return f"Error running command: {str(e)}"
+
+    def _tool_exploit_successful(self) -> None:
+        """Signal successful exploit completion."""
+        exit()
+
+    @staticmethod
+    def _eval_arg(node: ast.AST) -> Any:
+        """Evaluate a tool argument built only from literals, containers and + / * between them."""
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            items = [Caller._eval_arg(elt) for elt in node.elts]
+            return {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)](items)
+        if isinstance(node, ast.Dict) and None not in node.keys:
+            return {Caller._eval_arg(k): Caller._eval_arg(v) for k, v in zip(node.keys, node.values)}
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARG_BINOPS:
+            return _ARG_BINOPS[type(node.op)](Caller._eval_arg(node.left), Caller._eval_arg(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -Caller._eval_arg(node.operand)
+        raise ValueError(f"Unsupported tool argument: {ast.unparse(node)}")
+
+    def _parse_tool_call(self, tool_call_command: str) -> Tuple[str, List[Any], Dict[str, Any]]:
+        """
+        Parse a tool command like `debugger("a.c", 10, "x")` without evaluating it.
+
+        Returns:
+            Tuple of (tool name, positional args, keyword args)
+
+        Raises:
+            ValueError: If the command is not a single call to a known tool with literal arguments
+        """
+        node = ast.parse(tool_call_command.strip(), mode='eval').body
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+            raise ValueError("Expected a single tool call like tool_name(args)")
+        if node.func.id not in self._tool_table:
+            raise ValueError(f"Unknown tool '{node.func.id}'. Available tools: {', '.join(self._tool_table)}")
+
+        args = [self._eval_arg(arg) for arg in node.args]
+        kwargs = {kw.arg: self._eval_arg(kw.value) for kw in node.keywords}
+        return node.func.id, args, kwargs
+
     def call_tool(self, tool_call_command: str) -> Any:
         """
         Execute a tool command and return its output.
@@ -55,52 +142,10 @@ class Caller:
         """
         logger.info(f"{Fore.GREEN}Running tool: {tool_call_command} {self.file}")
 
-        def code_browser_source(file_name: str, function_name: str) -> str:
-            """Browse source code and extract function definitions."""
-            if "::" in function_name:
-                function_name = function_name.split("::")[1]
-            return self.code_browser.code_browser_source(file_name, function_name)
-
-        def debugger(filename: str, line_number: int, exprs: str, 
-                    input_vars: Optional[Dict] = None) -> str:
-            """Execute debugger at specified location."""
-            return self.debugger.debug(filename, line_number, exprs, input_vars)
-
-        def r2(filename: str, commands: str|list[str], output_format = 'text') -> str:
-            """Execute radare2 with specified analysis."""
-            return self.r2.execute(filename,commands,output_format)
-        
-        def run_script(script_code: str) -> str:
-            """Execute a script against target file."""
-            return self.script_runner.run_script(self.file, script_code)
-
-        def bash_shell(command: str) -> str:
-            """Execute a shell command semi-safely."""
-            cmd = sanitize_command(command)
-            try:
-                output = subprocess.run(cmd, shell=True, text=True, 
-                                     capture_output=True, check=False)
-                return f"{output.stdout}{output.stderr}"
-            except Exception as e:
-                return f"Error running command: {str(e)}"
-
-        def exploit_successful() -> None:
-            """Signal successful exploit completion."""
-            exit()
-
-        # Create local namespace with available tool functions
-        local_ns = {
-            "code_browser_source": code_browser_source,
-            "debugger": debugger, 
-            "run_script": run_script,
-            "exploit_successful": exploit_successful,
-            "bash_shell": bash_shell,
-            "radare2":r2
-        }
-
         # Execute command in controlled environment
         try:
-            tool_response = eval(tool_call_command, {}, local_ns)
+            tool_name, args, kwargs = self._parse_tool_call(tool_call_command)
+            tool_response = self._tool_table[tool_name](*args, **kwargs)
             logger.info(f"{Fore.CYAN}Tool Response: {tool_response}")
             return tool_response
         except Exception as e:
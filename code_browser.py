@@ -1,12 +1,29 @@
 from clang.cindex import Index, CursorKind
 import os
 import re
-from typing import Dict
+from typing import Dict, List, Optional
 from llm import LLM
 from logger import logger
+from utils import read_source, source_digest
 from colorama import Fore, Style
 
+# Braces only, so the end-of-function scan skips everything else in C
+_BRACE_RE = re.compile(r'[{}]')
+
+
 class CodeBrowser:
+    # Function-definition patterns for text-based extraction; {n} is the escaped function name
+    FUNCTION_PATTERN_TEMPLATES = [
+        # Go: func functionName(...)
+        r'\b(func\s+\w+\s+)?{n}\s*\(',
+        # Python: def functionName(...)
+        r'\bdef\s+{n}\s*\(',
+        # Java/C#: functionName(...) {{
+        r'\b{n}\s*\([^)]*\)\s*{{',
+        # Rust: fn function_name(...)
+        r'\bfn\s+{n}\s*\(',
+    ]
+
     def __init__(self, llm_model: str = "gpt-4o-mini", provider: str = None):
         """
         Initialize CodeBrowser.
@@ -18,6 +35,71 @@ class CodeBrowser:
         self.index = Index.create()
         # Use the provider from the agent, or auto-detect if not specified
         self.llm = LLM(model=llm_model, provider=provider)
+        # Parsed translation units and their symbol indexes, keyed by (filename, content digest, args)
+        self._tu_cache = {}
+        self._symbol_cache = {}
+        # Extracted bodies: filename -> (content digest, {function name: body}); only the current version is kept
+        self._body_cache = {}
+
+    def _read_source(self, filename: str):
+        """
+        Read a source file through the shared per-file cache in utils.read_source.
+
+        All extractors go through here, so a file is read and decoded once per change,
+        across every CodeBrowser in the process.
+
+        Returns:
+            Tuple of (full text, tuple of lines with line endings)
+
+        Raises:
+            ValueError: If the file is binary
+        """
+        is_binary, text, file_lines = read_source(filename)
+        if is_binary:
+            raise ValueError(f"Not a source file: {filename}")
+        return text, file_lines
+
+    def _get_symbols(self, filename: str, args: Optional[List[str]] = None) -> Dict:
+        """
+        Parse a file with libclang once and index its functions and classes by name.
+
+        Results are cached per (filename, content digest, args), so repeated lookups against
+        an unchanged file skip the parse and the AST walk, even if its mtime moved.
+
+        Args:
+            filename: Path to the source file
+            args: Extra compiler arguments passed to libclang
+
+        Returns:
+            Dict with 'functions' and 'classes', each mapping spelling -> first matching cursor
+        """
+        key = (filename, source_digest(filename), tuple(args or ()))
+        symbols = self._symbol_cache.get(key)
+        if symbols is not None:
+            return symbols
+
+        # Drop stale entries for this file before reparsing
+        for stale in [k for k in self._symbol_cache if k[0] == filename and k[2] == key[2]]:
+            self._symbol_cache.pop(stale, None)
+            self._tu_cache.pop(stale, None)
+
+        tu = self.index.parse(filename, args=args)
+        if not tu:
+            raise ValueError(f"Failed to parse {filename}")
+
+        functions = {}
+        classes = {}
+        for node in tu.cursor.walk_preorder():
+            if node.kind == CursorKind.FUNCTION_DECL or node.kind == CursorKind.CXX_METHOD:
+                functions.setdefault(node.spelling, node)
+            elif node.kind == CursorKind.CLASS_DECL:
+                classes.setdefault(node.spelling, node)
+
+        symbols = {'functions': functions, 'classes': classes}
+        # Keep the TU alive for as long as its cursors are cached
+        self._tu_cache[key] = tu
+        self._symbol_cache[key] = symbols
+        return symbols
 
     def get_class_body(self, filename: str, class_name: str) -> Dict:
         """
@@ -33,18 +115,8 @@ class CodeBrowser:
         if not os.path.exists(filename):
             raise FileNotFoundError(f"File not found: {filename}")
 
-        # Parse the source file with C++ language options
-        tu = self.index.parse(filename, args=['-x', 'c++'])
-        if not tu:
-            raise ValueError(f"Failed to parse {filename}")
-
-        # Find the target class
-        class_node = None
-        for node in tu.cursor.walk_preorder():
-            if (node.kind == CursorKind.CLASS_DECL and 
-                node.spelling == class_name):
-                class_node = node
-                break
+        # Parse the source file with C++ language options and find the target class
+        class_node = self._get_symbols(filename, ['-x', 'c++'])['classes'].get(class_name)
 
         if not class_node:
             raise ValueError(f"Class '{class_name}' not found in {filename}")
@@ -53,9 +125,8 @@ class CodeBrowser:
         start = class_node.extent.start
         end = class_node.extent.end
         
-        # Read the original file to get the complete source
-        with open(filename, 'r') as f:
-            file_lines = f.readlines()
+        # Get the complete source from the shared per-file cache
+        _, file_lines = self._read_source(filename)
 
         # Extract class lines with line numbers
         class_lines = file_lines[start.line-1:end.line]
@@ -87,51 +158,38 @@ class CodeBrowser:
         if not os.path.exists(filename):
             raise FileNotFoundError(f"File not found: {filename}")
         
-        with open(filename, 'r') as f:
-            file_lines = f.readlines()
+        text, file_lines = self._read_source(filename)
         
-        # Try to find the function using regex patterns for different languages
-        function_patterns = [
-            # Go: func functionName(...)
-            rf'\b(func\s+\w+\s+)?{re.escape(function_name)}\s*\(',
-            # Python: def functionName(...)
-            rf'\bdef\s+{re.escape(function_name)}\s*\(',
-            # Java/C#: functionName(...) {
-            rf'\b{re.escape(function_name)}\s*\([^)]*\)\s*{{',
-            # Rust: fn function_name(...)
-            rf'\bfn\s+{re.escape(function_name)}\s*\(',
-        ]
+        # Try to find the function using one alternation of the per-language patterns,
+        # scanning the whole file once instead of every pattern against every line
+        escaped = re.escape(function_name)
+        function_pattern = re.compile('|'.join(
+            template.format(n=escaped) for template in self.FUNCTION_PATTERN_TEMPLATES
+        ))
         
         start_line = None
-        for i, line in enumerate(file_lines):
-            for pattern in function_patterns:
-                if re.search(pattern, line):
-                    start_line = i
-                    break
-            if start_line is not None:
-                break
+        match = function_pattern.search(text)
+        if match:
+            start_line = text.count('\n', 0, match.start())
+            start_offset = text.rfind('\n', 0, match.start()) + 1
         
         if start_line is None:
             raise ValueError(f"Function '{function_name}' not found in {filename}")
         
-        # Find the function end by counting braces
+        # Find the function end by counting braces, visiting only the brace characters
         brace_count = 0
         in_function = False
         end_line = start_line
         
-        for i in range(start_line, len(file_lines)):
-            line = file_lines[i]
-            for char in line:
-                if char == '{':
-                    brace_count += 1
-                    in_function = True
-                elif char == '}':
-                    brace_count -= 1
-                    if in_function and brace_count == 0:
-                        end_line = i
-                        break
-            if in_function and brace_count == 0:
-                break
+        for brace in _BRACE_RE.finditer(text, start_offset):
+            if brace.group() == '{':
+                brace_count += 1
+                in_function = True
+            else:
+                brace_count -= 1
+                if in_function and brace_count == 0:
+                    end_line = start_line + text.count('\n', start_offset, brace.start())
+                    break
         
         if end_line == start_line:
             # If we couldn't find the end, include the next 50 lines or until end of file
@@ -156,6 +214,9 @@ class CodeBrowser:
         """
         Extract a function's body from a source file.
         Uses libclang for C/C++ files, text-based parsing for other languages.
+
+        Results are memoized per (filename, function name, content digest), so the agent
+        asking for the same function again skips the extraction until the file changes.
         
         Args:
             filename: Path to the source file
@@ -167,10 +228,24 @@ class CodeBrowser:
         if not os.path.exists(filename):
             raise FileNotFoundError(f"File not found: {filename}")
 
+        digest = source_digest(filename)
+        cached = self._body_cache.get(filename)
+        if cached is None or cached[0] != digest:
+            # The file changed: drop every body extracted from its previous version
+            cached = (digest, {})
+            self._body_cache[filename] = cached
+        bodies = cached[1]
+        body = bodies.get(function_name)
+        if body is None:
+            body = self._extract_function_body(filename, function_name)
+            bodies[function_name] = body
+        return body
+
+    def _extract_function_body(self, filename: str, function_name: str) -> Dict:
+        """Uncached get_function_body: header, libclang, then text-based extraction."""
         # For .h files, return the full file
         if filename.endswith('.h'):
-            with open(filename, 'r') as f:
-                file_lines = f.readlines()
+            _, file_lines = self._read_source(filename)
             numbered_lines = [
                 f"{i+1}: {line.rstrip()}" 
                 for i, line in enumerate(file_lines)
@@ -186,18 +261,8 @@ class CodeBrowser:
         # For C/C++ files, use libclang
         if filename.endswith('.c') or filename.endswith('.cpp'):
             try:
-                # Parse the source file
-                tu = self.index.parse(filename)
-                if not tu:
-                    raise ValueError(f"Failed to parse {filename}")
-
-                # Find the target function
-                function_node = None
-                for node in tu.cursor.walk_preorder():
-                    if ((node.kind == CursorKind.FUNCTION_DECL or node.kind == CursorKind.CXX_METHOD) and 
-                            node.spelling == function_name):
-                        function_node = node
-                        break
+                # Parse the source file (cached) and find the target function
+                function_node = self._get_symbols(filename)['functions'].get(function_name)
 
                 if not function_node:
                     try:
@@ -211,9 +276,8 @@ class CodeBrowser:
                     start = function_node.extent.start
                     end = function_node.extent.end
                     
-                    # Read the original file to get the complete source
-                    with open(filename, 'r') as f:
-                        file_lines = f.readlines()
+                    # Get the complete source from the shared per-file cache
+                    _, file_lines = self._read_source(filename)
 
                     # Extract function lines with line numbers
                     function_lines = file_lines[start.line-1:end.line]
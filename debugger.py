@@ -13,16 +13,66 @@ Note: This tool still executes compilers/debuggers on the host. Only run on trus
 """
 
 import subprocess
-import tempfile
 import os
+import re
 import shlex
 import shutil
 import socket
 import time
 import json
-from typing import Dict, Optional, Union, Literal, Tuple
+import struct
+import hashlib
+import platform
+import functools
+import atexit
+import tempfile
+import selectors
+import collections
+from typing import Dict, List, Optional, Union, Literal, Tuple
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # non-POSIX: compile cache works without cross-process locking
+    fcntl = None
+
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # optional: stdlib json is only slower on multi-MB debugger logs
+    _json_dumps = json.dumps
+
+
+@functools.lru_cache(maxsize=64)
+def _which(exe: str) -> Optional[str]:
+    """shutil.which, memoized: toolchain locations don't change within a run."""
+    return shutil.which(exe)
+
+
+def _spawn_argv(cmd: List[str]) -> List[str]:
+    """
+    Resolve argv[0] to an absolute path. With close_fds=False this lets subprocess
+    launch via posix_spawn instead of fork+exec; our own fds are non-inheritable
+    by default (PEP 446), so nothing extra leaks into the child.
+    """
+    if os.path.dirname(cmd[0]):
+        return list(cmd)
+    return [_which(cmd[0]) or cmd[0], *cmd[1:]]
+
+
+# interpreter basename from a shebang: `#!/usr/bin/env python3 -u` -> python3
+_SHEBANG_RE = re.compile(rb'^#!\s*(?:\S*/)?(?:env\s+)?([A-Za-z0-9_+-]+)')
+
+
+# `#include "x.h"` lines; angle-bracket includes are system headers, covered by the compiler version
+_QUOTED_INCLUDE_RE = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*"([^"\n]+)"', re.MULTILINE)
+
+
+# (path, st_mtime_ns, st_size) -> parsed header, so unchanged binaries are only sniffed once
+_HEADER_CACHE: Dict[Tuple[str, int, int], Tuple[Optional[str], Optional[str], int, bool]] = {}
+
 
 class Debugger:
     """
@@ -47,6 +97,15 @@ class Debugger:
         '.jar': 'java',
     }
 
+    SHEBANG_LANG_MAP = {
+        'python': 'python', 'python3': 'python', 'python2': 'python', 'pypy': 'python', 'pypy3': 'python',
+        'node': 'node', 'nodejs': 'node',
+        'ruby': 'ruby',
+        'php': 'php',
+        'bash': 'bash', 'sh': 'bash', 'zsh': 'bash', 'dash': 'bash',
+        'perl': 'perl',
+    }
+
     ARCH_MAP = {
         'x86-64': ('i386:x86-64', None),
         'x86_64': ('i386:x86-64', None),
@@ -58,6 +117,22 @@ class Debugger:
         'mips': ('mips', 'qemu-mips'),
     }
 
+    # content-addressed cache of compiled targets, pruned oldest-first above the size cap
+    COMPILE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'nullkrypt3rs', 'ctfbin')
+    COMPILE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    # files next to the source that a single-file build may also read, keyed into the cache
+    LOCAL_DEP_SUFFIXES = {
+        'c': ('.h', '.inc'),
+        'cpp': ('.h', '.hh', '.hpp', '.hxx', '.inc', '.ipp', '.tpp'),
+        'rust': ('.rs',),
+        'zig': ('.zig',),
+    }
+
+    # machine ids from executable headers -> ARCH_MAP keys
+    ELF_MACHINE_MAP = {3: 'i386', 8: 'mips', 40: 'arm', 62: 'x86-64', 183: 'aarch64'}
+    MACHO_CPU_MAP = {7: 'i386', 0x01000007: 'x86-64', 12: 'arm', 0x0100000c: 'aarch64'}
+    PE_MACHINE_MAP = {0x14c: 'i386', 0x8664: 'x86-64', 0x1c0: 'arm', 0x1c4: 'arm', 0xaa64: 'aarch64'}
+
     # preferred debugger per language
     PREFERRED_DEBUGGER = {
         'go': 'dlv',          # Delve
@@ -71,34 +146,79 @@ class Debugger:
     }
 
     def __init__(self):
-        pass
+        self._workdir = None
 
-    # ----------------- utility helpers -----------------
+    def _get_workdir(self) -> str:
+        """Per-instance scratch dir for builds when COMPILE_CACHE_DIR is unusable; removed at exit."""
+        if self._workdir is None:
+            self._workdir = tempfile.mkdtemp(prefix='nullkrypt_')
+            atexit.register(shutil.rmtree, self._workdir, ignore_errors=True)
+        return self._workdir
 
-    @staticmethod
-    def _read_shebang(path: str) -> Optional[str]:
-        try:
-            with open(path, 'rb') as f:
-                start = f.read(128)
-            if start.startswith(b'#!'):
-                try:
-                    return start.split(b'\n', 1)[0].decode('utf-8', 'ignore')
-                except Exception:
-                    return None
-            return None
-        except Exception:
-            return None
+    # ----------------- utility helpers -----------------
 
-    @staticmethod
-    def _is_binary_file(file_path: str) -> bool:
-        try:
-            completed = subprocess.run(['file', '--brief', '--mime-type', file_path],
-                                       capture_output=True, text=True, check=True)
-            mime = completed.stdout.strip()
-            return not mime.startswith('text/')
-        except Exception:
-            TEXT_EXTENSIONS = {'.c', '.cpp', '.cc', '.py', '.java', '.txt', '.h', '.rs', '.go', '.js', '.rb', '.php', '.sh'}
-            return os.path.splitext(file_path)[1].lower() not in TEXT_EXTENSIONS
+    @classmethod
+    def _parse_header(cls, head: bytes, f) -> Tuple[Optional[str], Optional[str], int, bool]:
+        """
+        Parse ELF / Mach-O / PE magic bytes.
+        Returns (format or None, ARCH_MAP key or None, bitness or 0, whether head has NUL bytes).
+        """
+        has_nul = b'\x00' in head
+
+        if head[:4] == b'\x7fELF' and len(head) >= 20:
+            bits = 64 if head[4] == 2 else 32
+            endian = '>' if head[5] == 2 else '<'
+            machine = struct.unpack_from(endian + 'H', head, 18)[0]
+            return 'elf', cls.ELF_MACHINE_MAP.get(machine), bits, has_nul
+
+        if len(head) >= 8:
+            magic = struct.unpack_from('<I', head, 0)[0]
+            if magic in (0xfeedface, 0xfeedfacf, 0xcefaedfe, 0xcffaedfe):
+                endian = '<' if magic in (0xfeedface, 0xfeedfacf) else '>'
+                cputype = struct.unpack_from(endian + 'I', head, 4)[0]
+                bits = 64 if magic in (0xfeedfacf, 0xcffaedfe) else 32
+                return 'macho', cls.MACHO_CPU_MAP.get(cputype), bits, has_nul
+            if head[:4] == b'\xca\xfe\xba\xbe' and len(head) >= 12:
+                # Fat Mach-O and Java classes share this magic; fat headers have few archs,
+                # Java class files have a major version >= 45 here
+                nfat_arch = struct.unpack_from('>I', head, 4)[0]
+                if 0 < nfat_arch < 20:
+                    cputype = struct.unpack_from('>I', head, 8)[0]
+                    bits = 64 if cputype & 0x01000000 else 32
+                    return 'macho', cls.MACHO_CPU_MAP.get(cputype), bits, has_nul
+
+        if head[:2] == b'MZ' and len(head) >= 0x40:
+            e_lfanew = struct.unpack_from('<I', head, 0x3c)[0]
+            pe = head[e_lfanew:e_lfanew + 6]
+            if len(pe) < 6:
+                f.seek(e_lfanew)
+                pe = f.read(6)
+            if pe[:4] == b'PE\x00\x00' and len(pe) == 6:
+                machine = struct.unpack_from('<H', pe, 4)[0]
+                bits = 64 if machine in (0x8664, 0xaa64) else 32
+                return 'pe', cls.PE_MACHINE_MAP.get(machine), bits, has_nul
+
+        return None, None, 0, has_nul
+
+    @classmethod
+    def _sniff_header(cls, path: str) -> Tuple[Optional[str], Optional[str], int, bool]:
+        """Read the start of a file in-process and parse its executable header (cached by mtime/size)."""
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        cached = _HEADER_CACHE.get(key)
+        if cached is not None:
+            return cached
+        return cls._read_head(path)[1]
+
+    @classmethod
+    def _read_head(cls, path: str) -> Tuple[bytes, Tuple[Optional[str], Optional[str], int, bool]]:
+        """Read the first 256 bytes once; returns (head, parsed header) and caches the header."""
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            head = f.read(256)
+            result = cls._parse_header(head, f)
+        _HEADER_CACHE[(path, st.st_mtime_ns, st.st_size)] = result
+        return head, result
 
     def _detect_language(self, path: str, explicit_lang: Optional[str]) -> str:
         if explicit_lang:
@@ -106,19 +226,18 @@ class Debugger:
         ext = os.path.splitext(path)[1].lower()
         if ext in self.EXT_LANG_MAP:
             return self.EXT_LANG_MAP[ext]
-        shebang = self._read_shebang(path)
-        if shebang:
-            if 'python' in shebang:
-                return 'python'
-            if 'node' in shebang or 'nodejs' in shebang:
-                return 'node'
-            if 'ruby' in shebang:
-                return 'ruby'
-            if 'php' in shebang:
-                return 'php'
-            if 'bash' in shebang or 'sh' in shebang:
-                return 'bash'
-        if self._is_binary_file(path):
+        # no known extension: one read of the head serves both the shebang and the binary check
+        try:
+            head, (fmt, _, _, has_nul) = self._read_head(path)
+        except OSError:
+            return 'unknown'
+        if head.startswith(b'#!'):
+            m = _SHEBANG_RE.match(head)
+            if m:
+                lang = self.SHEBANG_LANG_MAP.get(m.group(1).decode('ascii', 'ignore'))
+                if lang:
+                    return lang
+        if fmt is not None or has_nul:
             return 'binary'
         return 'unknown'
 
@@ -140,15 +259,83 @@ class Debugger:
         }
         required = tool_map.get(lang, [])
         for exe in required:
-            if shutil.which(exe):
+            if _which(exe):
                 return
         if required:
             pretty = ", ".join(required)
             raise RuntimeError(f"Required tool(s) for language '{lang}' not found: {pretty}. Install them and ensure they're on PATH.")
 
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _compiler_version(exe: str) -> str:
+        version_cmd = [exe, 'version'] if exe in ('go', 'zig') else [exe, '--version']
+        try:
+            return subprocess.run(_spawn_argv(version_cmd), capture_output=True, text=True, check=True, close_fds=False).stdout
+        except Exception:
+            return ''
+
+    def _prune_compile_cache(self):
+        """Delete least recently used artifacts once the cache grows past COMPILE_CACHE_MAX_BYTES."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.COMPILE_CACHE_DIR):
+            if entry.is_file() and not entry.name.endswith(('.lock', '.tmp')):
+                st = entry.stat()
+                entries.append((st.st_atime, st.st_size, entry.path))
+                total += st.st_size
+        for _, size, artifact in sorted(entries):
+            if total <= self.COMPILE_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(artifact)
+                total -= size
+                os.remove(artifact + '.lock')
+            except OSError:
+                pass
+
+    def _local_dependencies(self, path: str, lang: str) -> List[str]:
+        """
+        Local files a build of `path` may read besides the source itself: sibling
+        headers/modules, plus quoted C/C++ includes followed transitively (so
+        `#include "inc/x.h"` and headers pulled in by headers are covered too).
+        """
+        source = os.path.abspath(path)
+        deps = set()
+        suffixes = self.LOCAL_DEP_SUFFIXES.get(lang)
+        if suffixes:
+            try:
+                for entry in os.scandir(os.path.dirname(source)):
+                    if entry.name.endswith(suffixes) and entry.is_file():
+                        deps.add(entry.path)
+            except OSError:
+                pass
+
+        if lang in ('c', 'cpp'):
+            pending, seen = [source], {source}
+            while pending:
+                current = pending.pop()
+                try:
+                    with open(current, 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                for match in _QUOTED_INCLUDE_RE.finditer(data):
+                    name = match.group(1).decode('utf-8', 'replace')
+                    include = os.path.normpath(os.path.join(os.path.dirname(current), name))
+                    if include not in seen and os.path.isfile(include):
+                        seen.add(include)
+                        deps.add(include)
+                        pending.append(include)
+
+        deps.discard(source)
+        return sorted(deps)
+
     def _compile_source(self, path: str, lang: str) -> str:
-        base = os.path.splitext(path)[0]
-        out = base + ".ctf"
+        """
+        Compile a source file for debugging, reusing a cached artifact when the source,
+        its local headers/modules, flags, target env and compiler version are unchanged.
+        """
+        out = '{out}'  # placeholder, resolved once the cache key is known
         env = None
 
         if lang == 'c':
@@ -158,19 +345,8 @@ class Debugger:
         elif lang == 'rust':
             cmd = ['rustc', '-C', 'debuginfo=2', '-C', 'opt-level=0', path, '-o', out]
         elif lang == 'go':
-            host_uname = self._host_arch()
-            host_to_goarch = {
-                'x86_64': 'amd64', 'amd64': 'amd64',
-                'aarch64': 'arm64', 'arm64': 'arm64',
-                'armv7l': 'arm', 'armv7': 'arm',
-                'i386': '386', 'i686': '386'
-            }
-            goarch = host_to_goarch.get(host_uname, None)
-            try:
-                goos_completed = subprocess.run(['go', 'env', 'GOOS'], capture_output=True, text=True, check=True)
-                goos = goos_completed.stdout.strip() or os.uname().sysname.lower()
-            except Exception:
-                goos = os.uname().sysname.lower() if hasattr(os, 'uname') else 'linux'
+            goarch = self._go_arch_for_host()
+            goos = self._go_env_goos()
 
             env = os.environ.copy()
             if goarch:
@@ -182,41 +358,99 @@ class Debugger:
         else:
             raise RuntimeError(f"Unsupported compile language: {lang}")
 
+        key_material = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            key_material.update(f.read())
+        # editing a header must not reuse a binary built from the old one
+        for dep in self._local_dependencies(path, lang):
+            try:
+                with open(dep, 'rb') as f:
+                    dep_bytes = f.read()
+            except OSError:
+                continue
+            key_material.update(f"\0{dep}\0{len(dep_bytes)}\0".encode())
+            key_material.update(dep_bytes)
+        key_material.update(repr(cmd).encode())
+        if env is not None:
+            key_material.update(repr((env.get('GOARCH'), env.get('GOOS'))).encode())
+        key_material.update(self._compiler_version(cmd[0]).encode())
+        key = key_material.hexdigest()
+
         try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True, env=env)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Compilation failed ({lang}): {e.stderr or e.stdout}")
-        return out
+            os.makedirs(self.COMPILE_CACHE_DIR, exist_ok=True)
+        except OSError:
+            # No usable cache dir: keep builds in this instance's workdir for its lifetime
+            out = os.path.join(self._get_workdir(), key + ".ctf")
+            if os.path.exists(out):
+                return out
+            cmd = [out if arg == '{out}' else arg for arg in cmd]
+            try:
+                subprocess.run(_spawn_argv(cmd), check=True, capture_output=True, text=True, env=env, close_fds=False)
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"Compilation failed ({lang}): {e.stderr or e.stdout}")
+            return out
+
+        cached = os.path.join(self.COMPILE_CACHE_DIR, key)
+        with open(cached + '.lock', 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(cached):
+                os.utime(cached)  # refresh atime/mtime for LRU pruning
+                return cached
+
+            tmp = f"{cached}.{os.getpid()}.tmp"
+            cmd = [tmp if arg == '{out}' else arg for arg in cmd]
+            try:
+                subprocess.run(_spawn_argv(cmd), check=True, capture_output=True, text=True, env=env, close_fds=False)
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"Compilation failed ({lang}): {e.stderr or e.stdout}")
+            os.replace(tmp, cached)
+
+        self._prune_compile_cache()
+        return cached
 
     def _detect_binary_arch(self, path: str) -> Tuple[str, Optional[str]]:
         try:
-            completed = subprocess.run(['file', '--brief', path], capture_output=True, text=True, check=True)
-            out = completed.stdout.lower()
+            fmt, arch, bits, _ = self._sniff_header(path)
         except Exception:
             return "", None
 
-        for key, (gdbarch, qemu_prog) in self.ARCH_MAP.items():
-            if key in out:
-                return gdbarch, qemu_prog
-        if 'elf 64-bit' in out or 'mach-o 64-bit' in out:
-            if 'arm' in out or 'aarch64' in out or 'arm64' in out:
-                return 'aarch64', 'qemu-aarch64'
+        if arch:
+            return self.ARCH_MAP[arch]
+        if fmt and bits == 64:
             return 'i386:x86-64', None
-        if 'elf 32-bit' in out:
+        if fmt == 'elf' and bits == 32:
             return 'i386', None
         return "", None
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _go_env_goos() -> str:
+        try:
+            goos_completed = subprocess.run(_spawn_argv(['go', 'env', 'GOOS']), capture_output=True, text=True, check=True, close_fds=False)
+            return goos_completed.stdout.strip() or os.uname().sysname.lower()
+        except Exception:
+            return os.uname().sysname.lower() if hasattr(os, 'uname') else 'linux'
+
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _go_arch_for_host(cls) -> Optional[str]:
+        host_to_goarch = {
+            'x86_64': 'amd64', 'amd64': 'amd64',
+            'aarch64': 'arm64', 'arm64': 'arm64',
+            'armv7l': 'arm', 'armv7': 'arm',
+            'i386': '386', 'i686': '386'
+        }
+        return host_to_goarch.get(cls._host_arch(), None)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
     def _host_arch() -> str:
+        # host arch never changes within a process, and Python already knows it
         try:
-            uname = subprocess.run(['uname', '-m'], capture_output=True, text=True, check=True)
-            return uname.stdout.strip().lower()
+            return (platform.machine() or os.uname().machine).lower()
         except Exception:
-            try:
-                import platform
-                return platform.machine().lower()
-            except Exception:
-                return ""
+            return ""
 
     @staticmethod
     def _archs_match(host_arch: str, binary_gdb_arch: str) -> bool:
@@ -236,11 +470,118 @@ class Debugger:
 
     @staticmethod
     def _find_free_port() -> int:
-        s = socket.socket()
-        s.bind(('127.0.0.1', 0))
-        port = s.getsockname()[1]
-        s.close()
-        return port
+        with socket.socket() as s:
+            # defensive only: the probe is bound and closed, never connected, so it leaves no TIME_WAIT
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()[1]
+
+    @staticmethod
+    def _port_listening(port: int) -> Optional[bool]:
+        """True if a socket is in LISTEN on `port` per /proc/net/tcp{,6}; None if /proc isn't there."""
+        suffix = f":{port:04X}"
+        found_table = False
+        for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+            try:
+                with open(table) as f:
+                    next(f, None)  # header
+                    found_table = True
+                    for row in f:
+                        fields = row.split()
+                        # fields[1] is local_address (hex ip:port), fields[3] the state; 0A = LISTEN
+                        if len(fields) > 3 and fields[3] == '0A' and fields[1].endswith(suffix):
+                            return True
+            except OSError:
+                continue
+        return False if found_table else None
+
+    @classmethod
+    def _wait_for_port(cls, port: int, proc: Optional[subprocess.Popen] = None, attempts: int = 50) -> bool:
+        """
+        Poll until something listens on port (or `proc` exits), without connecting to it.
+
+        qemu-user's gdbstub serves a single connection, so a connect() probe would use it up
+        and let the guest run undebugged. Where /proc isn't available this returns False and
+        gdb's own tcp auto-retry covers the startup race.
+        """
+        for _ in range(attempts):
+            listening = cls._port_listening(port)
+            if listening:
+                return True
+            if listening is None:
+                return False
+            if proc is not None and proc.poll() is not None:
+                return False
+            time.sleep(0.01)
+        return False
+
+    @staticmethod
+    def _collect_output(proc: subprocess.Popen, stdin_data: str = '', timeout: Optional[float] = None,
+                        head_lines: int = 4096, tail_lines: int = 4096) -> Tuple[str, str]:
+        """
+        Drain proc's stdout/stderr as it runs (like communicate(), but bounded).
+        Each stream keeps its first `head_lines` and last `tail_lines` lines, so a huge
+        `info functions` dump can't push out the disassembly/registers printed before it.
+        Raises subprocess.TimeoutExpired like communicate().
+        """
+        if proc.stdin:
+            try:
+                if stdin_data:
+                    proc.stdin.write(stdin_data.encode())
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        bufs = {}
+        sel = selectors.DefaultSelector()
+        for stream in (proc.stdout, proc.stderr):
+            if stream:
+                sel.register(stream, selectors.EVENT_READ)
+                bufs[stream] = {'head': [], 'tail': collections.deque(maxlen=tail_lines),
+                                'dropped': 0, 'partial': b''}
+
+        def _push(buf, line: bytes):
+            if len(buf['head']) < head_lines:
+                buf['head'].append(line)
+                return
+            if len(buf['tail']) == buf['tail'].maxlen:
+                buf['dropped'] += 1
+            buf['tail'].append(line)
+
+        try:
+            while sel.get_map():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise subprocess.TimeoutExpired(proc.args, timeout)
+                for key, _ in sel.select(remaining):
+                    buf = bufs[key.fileobj]
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        sel.unregister(key.fileobj)
+                        if buf['partial']:
+                            _push(buf, buf['partial'])
+                            buf['partial'] = b''
+                        continue
+                    *lines, buf['partial'] = (buf['partial'] + chunk).split(b'\n')
+                    for ln in lines:
+                        _push(buf, ln + b'\n')
+        finally:
+            sel.close()
+
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        proc.wait(timeout=remaining)
+
+        def _join(stream) -> str:
+            buf = bufs.get(stream)
+            if not buf:
+                return ''
+            parts = buf['head']
+            if buf['dropped']:
+                parts = parts + [f"... [{buf['dropped']} lines omitted] ...\n".encode()]
+            return b''.join(parts + list(buf['tail'])).decode(errors='replace')
+
+        return _join(proc.stdout), _join(proc.stderr)
 
     # ----------------- script creation helpers -----------------
 
@@ -249,7 +590,8 @@ class Debugger:
                            expressions: str,
                            mode: str = 'local',
                            remote_port: Optional[int] = None,
-                           gdb_arch: Optional[str] = None) -> str:
+                           gdb_arch: Optional[str] = None) -> Tuple[str, List[str]]:
+        """Build the gdb command sequence; returns (script_text, ['-ex', cmd, ...])."""
         file_cmd_arg = shlex.quote(binary_for_file_cmd)
         exprs_list = [e.strip() for e in (expressions or "").split(',') if e.strip()]
 
@@ -277,6 +619,9 @@ class Debugger:
         else:
             if break_cmd:
                 lines.append(break_cmd)
+            # Keep retrying the connect while qemu's gdbstub is still starting up
+            lines.append("set tcp auto-retry on")
+            lines.append("set tcp connect-timeout 5")
             lines.append(f"target remote :{remote_port}")
             lines.append("continue")
 
@@ -307,18 +652,18 @@ class Debugger:
         lines.append('find $pc, $pc + 8192, "system"')
         lines.append("quit")
 
-        script = "\n".join(lines)
-        fd, path = tempfile.mkstemp(suffix='.gdb')
-        with os.fdopen(fd, 'w') as f:
-            f.write(script)
-        return path
+        ex_args = []
+        for cmd in lines:
+            if cmd:
+                ex_args += ['-ex', cmd]
+        return "\n".join(lines), ex_args
 
     # ----------------- main debug entry -----------------
 
     def debug(self, file: str, line: Union[int, str] = "", exprs: str = "",
               input_vars: Optional[Dict[str, Union[str, int, float]]] = None,
               lang: Optional[str] = None,
-              timeout_seconds: int = 180) -> Tuple[str, str]:
+              timeout_seconds: int = 180, verbose: bool = False) -> Tuple[str, str]:
         if not os.path.exists(file):
             raise FileNotFoundError(file)
 
@@ -327,14 +672,12 @@ class Debugger:
 
         # Interpreted languages: spawn language-appropriate debug servers instead
         if detected in ('python', 'node', 'ruby', 'php', 'bash', 'perl', 'java'):
-            return self._debug_interpreted(file, detected, line, exprs, input_vars, timeout_seconds)
+            return self._debug_interpreted(file, detected, line, exprs, input_vars, timeout_seconds, verbose)
 
-        compiled_by_us = False
         run_binary_path = None
 
         if detected in ('c', 'cpp', 'rust', 'go', 'zig'):
             run_binary_path = self._compile_source(file, detected)
-            compiled_by_us = True
         elif detected == 'binary':
             run_binary_path = file
         else:
@@ -347,7 +690,7 @@ class Debugger:
         use_qemu = False
         qemu_proc = None
         dbg_proc = None
-        script_path = None
+        script_contents = ''
 
         # Decide which native debugger to run
         try:
@@ -359,7 +702,7 @@ class Debugger:
 
             if detected == 'go':
                 # Delve is best for Go
-                dlv = shutil.which('dlv')
+                dlv = _which('dlv')
                 if not dlv:
                     raise RuntimeError('Delve (dlv) not found in PATH. Install github.com/go-delve/delve/cmd/dlv')
                 port = self._find_free_port()
@@ -372,14 +715,14 @@ class Debugger:
                     candidates = ['rust-gdb', 'rust-lldb', 'gdb', 'lldb']
                 else:
                     # c/cpp/zig/binary
-                    if host_is_darwin and shutil.which('lldb'):
+                    if host_is_darwin and _which('lldb'):
                         candidates = ['lldb', 'gdb', 'gdb-multiarch']
                     else:
                         candidates = ['gdb-multiarch', 'gdb', 'lldb']
 
                 found = None
                 for c in candidates:
-                    pathc = shutil.which(c)
+                    pathc = _which(c)
                     if pathc:
                         found = pathc
                         debugger_name = c
@@ -389,20 +732,20 @@ class Debugger:
 
                 # If we need qemu because arch mismatch, launch qemu-user and connect remotely
                 if not arch_ok:
-                    if not qemu_prog or shutil.which(qemu_prog) is None:
+                    if not qemu_prog or _which(qemu_prog) is None:
                         raise RuntimeError(f"Binary architecture '{gdb_arch}' does not match host '{host}', and qemu-user ('{qemu_prog}') not found.")
                     port = self._find_free_port()
                     qemu_cmd = [qemu_prog, '-g', str(port), run_binary_path]
-                    qemu_proc = subprocess.Popen(qemu_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                    time.sleep(0.3)
+                    qemu_proc = subprocess.Popen(_spawn_argv(qemu_cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, close_fds=False)
+                    self._wait_for_port(port, qemu_proc)
                     # create gdb script that does 'target remote :port'
-                    script_path = self._create_gdb_script(run_binary_path, line, exprs, mode='remote', remote_port=port, gdb_arch=gdb_arch)
+                    script_contents, ex_args = self._create_gdb_script(run_binary_path, line, exprs, mode='remote', remote_port=port, gdb_arch=gdb_arch)
                     # Use the found debugger in remote mode
-                    debugger_cmd = [found, '-q', '-x', script_path]
+                    debugger_cmd = [found, '-q', '-batch', *ex_args]
                 else:
                     # native run
                     if debugger_name and debugger_name.startswith('lldb'):
-                        # LLDB: create a short lldb command script file
+                        # LLDB: pass the commands one by one with -o
                         lldb_cmds = []
                         if line:
                             lldb_cmds.append(f'breakpoint set -n {shlex.quote(str(line))}')
@@ -410,33 +753,24 @@ class Debugger:
                         lldb_cmds.append('run')
                         lldb_cmds.append('thread backtrace all')
                         lldb_cmds.append('quit')
-                        fd, script_path = tempfile.mkstemp(suffix='.lldb')
-                        with os.fdopen(fd, 'w') as f:
-                            f.write('\n'.join(lldb_cmds))
-                        debugger_cmd = ['lldb', '-s', script_path]
+                        script_contents = '\n'.join(lldb_cmds)
+                        debugger_cmd = ['lldb']
+                        for cmd in lldb_cmds:
+                            debugger_cmd += ['-o', cmd]
                     else:
-                        # GDB path: create gdb script and run with -x
-                        script_path = self._create_gdb_script(run_binary_path, line, exprs, mode='local', gdb_arch=gdb_arch)
-                        debugger_cmd = [found, '-q', '-x', script_path, '--args', run_binary_path]
+                        # GDB path: pass the script as -ex commands
+                        script_contents, ex_args = self._create_gdb_script(run_binary_path, line, exprs, mode='local', gdb_arch=gdb_arch)
+                        debugger_cmd = [found, '-q', '-batch', *ex_args, '--args', run_binary_path]
 
-            # Print script for debugging visibility (and AI agent consumption)
-            if script_path and os.path.exists(script_path):
-                try:
-                    with open(script_path, 'r') as f:
-                        script_contents = f.read()
-                except Exception:
-                    script_contents = ''
-            else:
-                script_contents = ''
-            
-            print(f"Debugger command: {debugger_cmd}")
+            if verbose:
+                print(f"Debugger command: {debugger_cmd}")
             # Launch debugger process
             dbg_proc = subprocess.Popen(
-                debugger_cmd,
+                _spawn_argv(debugger_cmd),
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True
+                close_fds=False
             )
 
             commands = """
@@ -446,13 +780,18 @@ class Debugger:
             exit
             """
 
-            stdout, stderr = dbg_proc.communicate(commands)
-            stdout, stderr = dbg_proc.communicate(timeout=timeout_seconds)
+            stdout, stderr = self._collect_output(dbg_proc, commands, timeout=timeout_seconds)
 
             # collect qemu stderr if present
             if qemu_proc:
+                # qemu keeps running after gdb detaches; stop it so its pipes hit EOF right away
+                if qemu_proc.poll() is None:
+                    qemu_proc.terminate()
                 try:
-                    q_stdout, q_stderr = qemu_proc.communicate(timeout=0.2)
+                    q_stdout, q_stderr = qemu_proc.communicate(timeout=1.0)
+                except subprocess.TimeoutExpired:
+                    qemu_proc.kill()
+                    q_stdout, q_stderr = qemu_proc.communicate()
                 except Exception:
                     q_stdout, q_stderr = "", ""
                 if q_stderr:
@@ -474,34 +813,25 @@ class Debugger:
                 'success': True
             }
 
-            json_summary = json.dumps(summary)
+            json_summary = _json_dumps(summary)
 
             # Return human-readable stdout/stderr, but also print JSON on stderr for machine consumption
             # (so agent can parse the last line). We also return (stdout, stderr_with_json) tuple.
             stderr_with_json = (stderr or '') + '\n\n__DEBUG_SUMMARY_JSON_START__\n' + json_summary + '\n__DEBUG_SUMMARY_JSON_END__\n'
 
             # Also print to console for users
-            print('--- DEBUGGER STDOUT ---')
-            print(stdout)
-            print('--- DEBUGGER STDERR ---')
-            print(stderr)
-            print('--- DEBUGGER JSON SUMMARY ---')
-            print(json_summary)
+            if verbose:
+                print('--- DEBUGGER STDOUT ---')
+                print(stdout)
+                print('--- DEBUGGER STDERR ---')
+                print(stderr)
+                print('--- DEBUGGER JSON SUMMARY ---')
+                print(json_summary)
 
             return stdout, stderr_with_json
 
         finally:
-            # cleanup
-            try:
-                if script_path and os.path.exists(script_path):
-                    os.remove(script_path)
-            except Exception:
-                pass
-            if compiled_by_us and run_binary_path and os.path.exists(run_binary_path):
-                try:
-                    os.remove(run_binary_path)
-                except Exception:
-                    pass
+            # cleanup (compiled artifacts are kept for the next run)
             try:
                 if dbg_proc and dbg_proc.poll() is None:
                     dbg_proc.kill()
@@ -515,21 +845,21 @@ class Debugger:
 
     # ----------------- interpreted debug helpers -----------------
 
-    def _debug_interpreted(self, file: str, detected: str, line: Union[int, str], exprs: str, input_vars: Optional[Dict], timeout_seconds: int):
+    def _debug_interpreted(self, file: str, detected: str, line: Union[int, str], exprs: str, input_vars: Optional[Dict], timeout_seconds: int, verbose: bool = False):
         """
         Launch language-specific debug adapter or inspector for interpreted languages and capture logs.
         Returns (stdout, stderr_with_json)
         """
         if detected == 'python':
             # Use debugpy: start python with debugpy adapter listening on a free port
-            debugpy = shutil.which('python3') or shutil.which('python')
+            debugpy = _which('python3') or _which('python')
             if not debugpy:
                 raise RuntimeError('Python not found')
             port = self._find_free_port()
             cmd = [debugpy, '-m', 'debugpy', '--listen', f'127.0.0.1:{port}', '--wait-for-client', file]
             tool = 'debugpy'
         elif detected == 'node':
-            node = shutil.which('node')
+            node = _which('node')
             if not node:
                 raise RuntimeError('node not found')
             port = self._find_free_port()
@@ -537,7 +867,7 @@ class Debugger:
             tool = 'node-inspect'
         elif detected == 'java':
             # Start the JVM with JDWP agent (requires building .class/.jar first). Here we attempt to run jar.
-            java = shutil.which('java')
+            java = _which('java')
             if not java:
                 raise RuntimeError('java not found')
             port = self._find_free_port()
@@ -547,7 +877,7 @@ class Debugger:
         else:
             raise RuntimeError(f'Interpreted debug for {detected} not implemented in this helper')
 
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        proc = subprocess.Popen(_spawn_argv(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, close_fds=False)
         try:
             stdout, stderr = proc.communicate(timeout=timeout_seconds)
         except subprocess.TimeoutExpired:
@@ -563,15 +893,16 @@ class Debugger:
             'stderr': stderr,
             'success': proc.returncode == 0
         }
-        json_summary = json.dumps(summary)
+        json_summary = _json_dumps(summary)
         stderr_with_json = (stderr or '') + '\n\n__DEBUG_SUMMARY_JSON_START__\n' + json_summary + '\n__DEBUG_SUMMARY_JSON_END__\n'
 
-        print('--- INTERPRETED DEBUG STDOUT ---')
-        print(stdout)
-        print('--- INTERPRETED DEBUG STDERR ---')
-        print(stderr)
-        print('--- INTERPRETED DEBUG JSON SUMMARY ---')
-        print(json_summary)
+        if verbose:
+            print('--- INTERPRETED DEBUG STDOUT ---')
+            print(stdout)
+            print('--- INTERPRETED DEBUG STDERR ---')
+            print(stderr)
+            print('--- INTERPRETED DEBUG JSON SUMMARY ---')
+            print(json_summary)
 
         return stdout, stderr_with_json
 
@@ -580,7 +911,7 @@ if __name__ == "__main__":
     dbg = Debugger()
     # Example: debug the Go file (replace with your path)
     try:
-        out, err = dbg.debug("code/vulnerable.go", "main.main", "filename, result")
+        out, err = dbg.debug("code/vulnerable.go", "main.main", "filename, result", verbose=True)
         print('\n=== STDOUT ===')
         print(out)
         print('\n=== STDERR (with JSON) ===')
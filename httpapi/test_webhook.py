@@ -9,28 +9,47 @@ import requests
 import json
 import hmac
 import hashlib
+import io
 import os
+import sys
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from requests.adapters import HTTPAdapter
+
+
+# One keep-alive session shared by all tests (the tests may run concurrently)
+_SESSION = requests.Session()
+_SESSION.mount('http://', HTTPAdapter(pool_connections=8, pool_maxsize=8))
+_SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=8))
+
 
 def create_signature(payload, secret):
-    """Create GitHub webhook signature."""
+    """Create GitHub webhook signature over the exact request body bytes."""
     if not secret:
         return None
     
-    mac = hmac.new(
-        secret.encode('utf-8'),
-        msg=payload.encode('utf-8'),
-        digestmod=hashlib.sha256
-    )
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    mac = _keyed_hmac(secret).copy()
+    mac.update(payload)
     return f"sha256={mac.hexdigest()}"
 
 
-def test_ping():
+@functools.lru_cache(maxsize=8)
+def _keyed_hmac(secret):
+    """HMAC-SHA256 already keyed with `secret`; callers work on a .copy()."""
+    return hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+
+def test_ping(out=None):
     """Test ping event."""
-    print("\n" + "="*60)
-    print("Testing PING event")
-    print("="*60)
+    out = out or sys.stdout
+    print("\n" + "="*60, file=out)
+    print("Testing PING event", file=out)
+    print("="*60, file=out)
     
     payload = {
         "zen": "Design for failure.",
@@ -42,15 +61,17 @@ def test_ping():
         }
     }
     
-    send_webhook("ping", payload)
+    send_webhook("ping", payload, out)
 
 
-def test_pr_opened():
+def test_pr_opened(out=None):
     """Test pull_request.opened event."""
-    print("\n" + "="*60)
-    print("Testing PULL REQUEST OPENED event")
-    print("="*60)
+    out = out or sys.stdout
+    print("\n" + "="*60, file=out)
+    print("Testing PULL REQUEST OPENED event", file=out)
+    print("="*60, file=out)
     
+    now = datetime.now().isoformat()
     payload = {
         "action": "opened",
         "number": 1,
@@ -63,8 +84,8 @@ def test_pr_opened():
             "user": {
                 "login": "test-user"
             },
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "base": {
                 "ref": "main",
                 "sha": "abc123"
@@ -86,15 +107,17 @@ def test_pr_opened():
         }
     }
     
-    send_webhook("pull_request", payload)
+    send_webhook("pull_request", payload, out)
 
 
-def test_pr_synchronize():
+def test_pr_synchronize(out=None):
     """Test pull_request.synchronize event."""
-    print("\n" + "="*60)
-    print("Testing PULL REQUEST SYNCHRONIZE event")
-    print("="*60)
+    out = out or sys.stdout
+    print("\n" + "="*60, file=out)
+    print("Testing PULL REQUEST SYNCHRONIZE event", file=out)
+    print("="*60, file=out)
     
+    now = datetime.now().isoformat()
     payload = {
         "action": "synchronize",
         "number": 1,
@@ -107,8 +130,8 @@ def test_pr_synchronize():
             "user": {
                 "login": "test-user"
             },
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "base": {
                 "ref": "main",
                 "sha": "abc123"
@@ -127,65 +150,68 @@ def test_pr_synchronize():
         }
     }
     
-    send_webhook("pull_request", payload)
+    send_webhook("pull_request", payload, out)
 
 
-def send_webhook(event_type, payload):
+def send_webhook(event_type, payload, out=None):
     """Send a webhook request to the server."""
+    out = out or sys.stdout
     url = os.environ.get("WEBHOOK_URL", "http://localhost:8080/webhook")
     secret = os.environ.get("GITHUB_WEBHOOK_SECRET", "")
     
-    payload_json = json.dumps(payload)
-    signature = create_signature(payload_json, secret)
+    # Serialize once: the signature must cover exactly the bytes we send
+    payload_bytes = json.dumps(payload).encode('utf-8')
+    signature = create_signature(payload_bytes, secret)
     
     headers = {
         "Content-Type": "application/json",
         "X-GitHub-Event": event_type,
-        "X-GitHub-Delivery": f"test-delivery-{datetime.now().timestamp()}",
+        "X-GitHub-Delivery": f"test-delivery-{time.time_ns()}",
         "User-Agent": "GitHub-Hookshot/test"
     }
     
     if signature:
         headers["X-Hub-Signature-256"] = signature
     
-    print(f"\nSending {event_type} event to {url}")
-    print(f"Payload: {json.dumps(payload, indent=2)[:200]}...")
+    print(f"\nSending {event_type} event to {url}", file=out)
+    print(f"Payload: {json.dumps(payload, indent=2)[:200]}...", file=out)
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        print(f"\nResponse Status: {response.status_code}")
-        print(f"Response Body: {json.dumps(response.json(), indent=2)}")
+        response = _SESSION.post(url, data=payload_bytes, headers=headers)
+        print(f"\nResponse Status: {response.status_code}", file=out)
+        print(f"Response Body: {json.dumps(response.json(), indent=2)}", file=out)
         
         if response.status_code in [200, 202]:
-            print("✅ Test PASSED")
+            print("✅ Test PASSED", file=out)
         else:
-            print("❌ Test FAILED")
+            print("❌ Test FAILED", file=out)
             
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=out)
 
 
-def test_health():
+def test_health(out=None):
     """Test health endpoint."""
-    print("\n" + "="*60)
-    print("Testing HEALTH endpoint")
-    print("="*60)
+    out = out or sys.stdout
+    print("\n" + "="*60, file=out)
+    print("Testing HEALTH endpoint", file=out)
+    print("="*60, file=out)
     
     url = os.environ.get("WEBHOOK_URL", "http://localhost:8080/health")
     url = url.replace("/webhook", "/health")
     
     try:
-        response = requests.get(url)
-        print(f"Status: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
+        response = _SESSION.get(url)
+        print(f"Status: {response.status_code}", file=out)
+        print(f"Response: {json.dumps(response.json(), indent=2)}", file=out)
         
         if response.status_code == 200:
-            print("✅ Health check PASSED")
+            print("✅ Health check PASSED", file=out)
         else:
-            print("❌ Health check FAILED")
+            print("❌ Health check FAILED", file=out)
             
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=out)
 
 
 def main():
@@ -198,14 +224,21 @@ def main():
     print(f"\nTarget URL: {webhook_url}")
     print(f"Secret configured: {bool(os.environ.get('GITHUB_WEBHOOK_SECRET'))}")
     
-    # Run tests
-    test_health()
-    test_ping()
+    # Run tests (independent of each other, so run them concurrently)
+    tests = [test_health, test_ping]
     
     # Uncomment to test actual PR events (will trigger analysis)
     # WARNING: These will attempt to fetch real PR data from GitHub
-    # test_pr_opened()
-    # test_pr_synchronize()
+    # tests += [test_pr_opened, test_pr_synchronize]
+    # Each test writes to its own buffer; reports are printed in order so output doesn't interleave
+    def run(test):
+        out = io.StringIO()
+        test(out)
+        return out.getvalue()
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        for report in ex.map(run, tests):
+            sys.stdout.write(report)
     
     print("\n" + "="*60)
     print("Test suite complete!")
@@ -1,23 +1,132 @@
 import os
 import re
-from typing import Dict, Optional, List
-from openai import OpenAI
-from anthropic import Anthropic
-import google.generativeai as genai
-import ollama
+import json
+import time
+import random
+import logging
+import functools
+import asyncio
+import hashlib
+import tempfile
+import threading
+import collections
+from typing import Dict, Optional, List, Iterator, Tuple
+try:
+    import numpy as np
+except ImportError:  # optional: only needed for the semantic response cache
+    np = None
+try:
+    import msgpack
+except ImportError:  # optional: faster cache-key serialization, JSON is the fallback
+    msgpack = None
 from constants import OPENAI_API_KEY, CLAUDE_API_KEY, GEMINI_API_KEY, OLLAMA_BASE_URL
+from logger import logger
+
+# Retried on Gemini/Ollama; OpenAI and Anthropic clients retry these themselves (see LLM.MAX_RETRIES)
+_TRANSIENT_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+_TRANSIENT_ERROR_NAMES = frozenset({"ResourceExhausted", "ServiceUnavailable", "InternalServerError",
+                                    "DeadlineExceeded", "TooManyRequests", "ConnectError", "ReadTimeout"})
+
+
+def _is_transient(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(status, int) and status in _TRANSIENT_STATUS:
+        return True
+    return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__name__ in _TRANSIENT_ERROR_NAMES
+
+
+# OpenAI models that take reasoning_effort and reject temperature
+_REASONING_MODELS = frozenset({"o3-mini", "o1-preview", "o1", "o3"})
+# Ollama models that get think=True
+_OLLAMA_THINKING_MODELS = frozenset({"qwen3:235b"})
+
+# Cheaper sibling models for short requests when routing is enabled (OpenAI/Claude take the
+# model per request; Gemini binds it to the GenerativeModel, so it isn't routed)
+_SMALL_MODELS = {
+    "gpt-4o": "gpt-4o-mini",
+    "gpt-4.1": "gpt-4.1-mini",
+    "gpt-4-turbo": "gpt-4o-mini",
+}
+_SMALL_CLAUDE_MODEL = "claude-3-5-haiku-latest"
+
+_HTTP_CLIENT = None
+# Bumped in forked children; LLM instances holding clients from an older generation rebuild them
+_FORK_GENERATION = 0
+
+
+def _http_client_options() -> Dict:
+    """Pool, timeout and HTTP/2 settings shared by the sync and async httpx clients."""
+    import httpx
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(max_connections=100, max_keepalive_connections=100, keepalive_expiry=60),
+        "timeout": httpx.Timeout(600.0, connect=5.0),
+    }
+
+
+def _shared_http_client():
+    """
+    One keep-alive connection pool shared by every sync OpenAI/Anthropic client in the
+    process, so new LLM instances don't redo TCP+TLS setup. Uses HTTP/2 when h2 is installed.
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        import httpx
+        _HTTP_CLIENT = httpx.Client(**_http_client_options())
+    return _HTTP_CLIENT
+
 
 class LLM:
-    def __init__(self, model: str = "o3-mini", provider: Optional[str] = None):
+    RESPONSE_CACHE_SIZE = 1024
+    SEMANTIC_CACHE_SIZE = 4096
+    SEMANTIC_CACHE_THRESHOLD = 0.95
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    # Output budgets used when a call doesn't pass max_tokens. Decode time grows with the
+    # tokens generated, so callers that expect short answers should pass a tighter cap.
+    DEFAULT_MAX_TOKENS = 4096
+    OLLAMA_NUM_PREDICT = 16384
+    # Retries for rate limits / 5xx / dropped connections, with jittered exponential backoff
+    MAX_RETRIES = 4
+    # provider -> time.monotonic() deadline set by the last throttled Gemini/Ollama call; other
+    # calls to that provider wait it out instead of piling more requests onto a struggling server
+    _COOLDOWN_UNTIL: Dict[str, float] = {}
+
+    # provider clients shared by every LLM instance in the process, keyed by (provider, credentials[, model])
+    _CLIENTS: Dict[tuple, object] = {}
+    _CLIENTS_LOCK = threading.Lock()
+
+    def __init__(self, model: str = "o3-mini", provider: Optional[str] = None, semantic_cache: bool = False,
+                 cache_key: Optional[str] = None, routing: bool = False, short_prompt_chars: int = 500,
+                 cache_dir: Optional[str] = None):
         """
         Initialize LLM with OpenAI, Claude, Gemini, or Ollama client.
         
         Args:
             model: Model name to use
             provider: Either 'openai', 'claude', 'gemini', or 'ollama'. If None, auto-detects based on available API keys.
+            semantic_cache: Reuse prompt() answers for near-identical prompts (cosine >= SEMANTIC_CACHE_THRESHOLD
+                of OpenAI embeddings). Off by default; needs numpy and an OpenAI key.
+            cache_key: Sent to OpenAI as prompt_cache_key so calls sharing a prompt prefix
+                (e.g. one agent's loop) are routed to the same prompt cache.
+            routing: Send requests shorter than short_prompt_chars (total message text) to a
+                cheaper sibling model (gpt-4o -> gpt-4o-mini, Claude Opus/Sonnet -> Haiku).
+                OpenAI and Claude only; off by default.
+            cache_dir: Directory of prompt() responses kept across runs, keyed by a hash of
+                provider, model, prompt and sampling settings; hits are reused whatever the
+                temperature. Meant for development reruns; off by default.
         """
         self.model = model
+        self.cache_key = cache_key
+        self.enable_routing = routing
+        self.short_prompt_chars = short_prompt_chars
+        self.cache_dir = cache_dir
         self.provider = None  # Will be set lazily
+        self._fork_generation = _FORK_GENERATION
         self._requested_provider = provider.lower() if provider else None
         
         # Lazy initialization - clients will be created when first needed
@@ -26,311 +135,706 @@ class LLM:
         self.gemini_client = None
         self.ollama_client = None
         self.should_reason = False
+        # async counterparts, created on first aaction()/aprompt()
+        self._async_client = None
+        self._async_claude_client = None
+        self._async_ollama_client = None
+        # provider-specific action/prompt implementations, bound by _initialize_client
+        self._action_impl = None
+        self._prompt_impl = None
+        # exact-match cache for deterministic (temperature 0) calls, LRU-evicted
+        self._response_cache = collections.OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        self.cache_stats = {"hits": 0, "misses": 0, "semantic_hits": 0}
+        # semantic cache: ring buffer of unit-norm prompt embeddings and their (reasoning, response)
+        self._semantic_cache = semantic_cache and np is not None and bool(OPENAI_API_KEY)
+        self._embedding_client = None
+        self._sem_matrix = None
+        self._sem_entries = []
+        self._sem_next = 0
         
+    @classmethod
+    def _shared_client(cls, key: tuple, factory):
+        with cls._CLIENTS_LOCK:
+            client = cls._CLIENTS.get(key)
+            if client is None:
+                client = cls._CLIENTS[key] = factory()
+            return client
+
+    # Provider SDKs are imported on first use: a run only pays for the one it talks to
+    # (google.generativeai alone pulls in grpc/protobuf).
+
+    def _openai_client(self):
+        from openai import OpenAI
+        return self._shared_client(("openai", OPENAI_API_KEY),
+                                   lambda: OpenAI(api_key=OPENAI_API_KEY, http_client=_shared_http_client(),
+                                                  max_retries=self.MAX_RETRIES))
+
+    def _claude_client(self):
+        from anthropic import Anthropic
+        return self._shared_client(("claude", CLAUDE_API_KEY),
+                                   lambda: Anthropic(api_key=CLAUDE_API_KEY, http_client=_shared_http_client(),
+                                                     max_retries=self.MAX_RETRIES))
+
+    def _gemini_model(self, system_instruction: Optional[str] = None):
+        import google.generativeai as genai
+        # genai.configure is process-global, so it only needs to run once per key
+        self._shared_client(("gemini-configure", GEMINI_API_KEY), lambda: genai.configure(api_key=GEMINI_API_KEY) or True)
+        if system_instruction:
+            # system prompts are fixed per caller, so there are only a handful of these
+            return self._shared_client(
+                ("gemini", GEMINI_API_KEY, self.model, system_instruction),
+                lambda: genai.GenerativeModel(model_name=self.model, system_instruction=system_instruction),
+            )
+        return self._shared_client(("gemini", GEMINI_API_KEY, self.model), lambda: genai.GenerativeModel(self.model))
+
+    def _ollama_client(self):
+        import ollama
+        return self._shared_client(("ollama", OLLAMA_BASE_URL), lambda: ollama.Client(host=OLLAMA_BASE_URL))
+
+    # Provider to try when the requested one has no API key, in order. Ollama needs no key.
+    _PROVIDER_FALLBACKS = {
+        "openai": ("openai", "claude", "gemini", "ollama"),
+        "claude": ("claude", "openai", "gemini", "ollama"),
+        "gemini": ("gemini", "openai", "claude", "ollama"),
+        "ollama": ("ollama",),
+    }
+
     def _initialize_client(self):
         """Lazy initialization of clients. Only called when actually needed."""
-        if self.client is not None or self.claude_client is not None or self.gemini_client is not None or self.ollama_client is not None:
-            return  # Already initialized
-        
-        # Determine which provider to use
-        provider = self._requested_provider
-        
-        # If no provider specified, auto-detect based on available keys
-        if not provider:
-            if OPENAI_API_KEY:
-                provider = "openai"
-            elif CLAUDE_API_KEY:
-                provider = "claude"
-            elif GEMINI_API_KEY:
-                provider = "gemini"
-            else:
-                # Default to Ollama if no API keys are set
-                provider = "ollama"
+        if self.provider is not None:
+            if self._fork_generation == _FORK_GENERATION:
+                return  # Already initialized
+            # forked since the clients were created: their sockets are shared with the parent
+            self._fork_generation = _FORK_GENERATION
+            self._async_client = self._async_claude_client = self._async_ollama_client = None
+            self._embedding_client = None
         
+        # If no provider specified, auto-detect based on available keys (OpenAI, Claude, Gemini, then Ollama)
+        provider = self._requested_provider or "openai"
+        if provider not in self._PROVIDER_FALLBACKS:
+            raise ValueError(f"Unknown provider: {provider}. Must be 'openai', 'claude', 'gemini', or 'ollama'")
+
         # Initialize the selected provider, with fallback if key not available
+        keys = {"openai": OPENAI_API_KEY, "claude": CLAUDE_API_KEY, "gemini": GEMINI_API_KEY, "ollama": True}
+        for candidate in self._PROVIDER_FALLBACKS[provider]:
+            if keys[candidate]:
+                self._set_provider(candidate)
+                break
+
+        # bind the provider's code paths once instead of branching on every call
+        self._action_impl = getattr(self, f"_action_{self.provider}")
+        self._prompt_impl = getattr(self, f"_prompt_{self.provider}")
+        if self.provider in ("gemini", "ollama"):
+            # these SDKs don't retry on their own
+            self._action_impl = functools.partial(self._call_with_retries, self._action_impl)
+            self._prompt_impl = functools.partial(self._call_with_retries, self._prompt_impl)
+
+    def _cooldown_remaining(self) -> float:
+        return self._COOLDOWN_UNTIL.get(self.provider, 0.0) - time.monotonic()
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        """Full-jitter exponential delay for this attempt, also applied to the provider's other callers."""
+        delay = random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+        deadline = time.monotonic() + delay
+        if deadline > self._COOLDOWN_UNTIL.get(self.provider, 0.0):
+            self._COOLDOWN_UNTIL[self.provider] = deadline
+        logger.warning(f"{self.provider} call failed ({exc!r}), retrying in {delay:.1f}s")
+        return delay
+
+    def _call_with_retries(self, fn, *args, **kwargs):
+        """Call fn, retrying transient provider errors with full-jitter exponential backoff."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            wait = self._cooldown_remaining()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as exc:
+                if attempt == self.MAX_RETRIES or not _is_transient(exc):
+                    raise
+                time.sleep(self._backoff(attempt, exc))
+
+    def _set_provider(self, provider: str):
+        """Create (or reuse) the client for provider and clear the others."""
+        self.client = self._openai_client() if provider == "openai" else None
+        self.claude_client = self._claude_client() if provider == "claude" else None
+        self.gemini_client = self._gemini_model() if provider == "gemini" else None
+        self.ollama_client = self._ollama_client() if provider == "ollama" else None
         if provider == "openai":
-            if OPENAI_API_KEY:
-                self.client = OpenAI(api_key=OPENAI_API_KEY)
-                self.should_reason = self.model in ["o3-mini", "o1-preview"]
-                self.claude_client = None
-                self.gemini_client = None
-                self.ollama_client = None
-                self.provider = "openai"
-            elif CLAUDE_API_KEY:
-                # Fallback to Claude if OpenAI key not available
-                self.claude_client = Anthropic(api_key=CLAUDE_API_KEY)
-                self.client = None
-                self.gemini_client = None
-                self.ollama_client = None
-                self.should_reason = False
-                self.provider = "claude"
-            elif GEMINI_API_KEY:
-                # Fallback to Gemini if OpenAI and Claude keys not available
-                genai.configure(api_key=GEMINI_API_KEY)
-                self.gemini_client = genai.GenerativeModel(self.model)
-                self.client = None
-                self.claude_client = None
-                self.ollama_client = None
-                self.should_reason = False
-                self.provider = "gemini"
-            else:
-                # Fallback to Ollama if no keys available
-                self.ollama_client = ollama.Client(host=OLLAMA_BASE_URL)
-                self.client = None
-                self.claude_client = None
-                self.gemini_client = None
-                self.should_reason = False
-                self.provider = "ollama"
-                
-        elif provider == "claude":
-            if CLAUDE_API_KEY:
-                self.claude_client = Anthropic(api_key=CLAUDE_API_KEY)
-                self.client = None
-                self.gemini_client = None
-                self.ollama_client = None
-                self.should_reason = False
-                self.provider = "claude"
-            elif OPENAI_API_KEY:
-                # Fallback to OpenAI if Claude key not available
-                self.client = OpenAI(api_key=OPENAI_API_KEY)
-                self.should_reason = self.model in ["o3-mini", "o1-preview"]
-                self.claude_client = None
-                self.gemini_client = None
-                self.ollama_client = None
-                self.provider = "openai"
-            elif GEMINI_API_KEY:
-                # Fallback to Gemini if Claude and OpenAI keys not available
-                genai.configure(api_key=GEMINI_API_KEY)
-                self.gemini_client = genai.GenerativeModel(self.model)
-                self.client = None
-                self.claude_client = None
-                self.ollama_client = None
-                self.should_reason = False
-                self.provider = "gemini"
-            else:
-                # Fallback to Ollama if no keys available
-                self.ollama_client = ollama.Client(host=OLLAMA_BASE_URL)
-                self.client = None
-                self.claude_client = None
-                self.gemini_client = None
-                self.should_reason = False
-                self.provider = "ollama"
-        
-        elif provider == "gemini":
-            if GEMINI_API_KEY:
-                genai.configure(api_key=GEMINI_API_KEY)
-                self.gemini_client = genai.GenerativeModel(self.model)
-                self.client = None
-                self.claude_client = None
-                self.ollama_client = None
-                self.should_reason = False
-                self.provider = "gemini"
-            elif OPENAI_API_KEY:
-                # Fallback to OpenAI if Gemini key not available
-                self.client = OpenAI(api_key=OPENAI_API_KEY)
-                self.should_reason = self.model in ["o3-mini", "o1-preview"]
-                self.claude_client = None
-                self.gemini_client = None
-                self.ollama_client = None
-                self.provider = "openai"
-            elif CLAUDE_API_KEY:
-                # Fallback to Claude if Gemini and OpenAI keys not available
-                self.claude_client = Anthropic(api_key=CLAUDE_API_KEY)
-                self.client = None
-                self.gemini_client = None
-                self.ollama_client = None
-                self.should_reason = False
-                self.provider = "claude"
-            else:
-                # Fallback to Ollama if no keys available
-                self.ollama_client = ollama.Client(host=OLLAMA_BASE_URL)
-                self.client = None
-                self.claude_client = None
-                self.gemini_client = None
-                self.should_reason = False
-                self.provider = "ollama"
-        
-        elif provider == "ollama":
-            # Ollama doesn't require an API key, just a base URL
-            self.ollama_client = ollama.Client(host=OLLAMA_BASE_URL)
-            self.should_reason = self.model in ["qwen3:235b"]
-            self.client = None
-            self.claude_client = None
-            self.gemini_client = None
-            self.should_reason = False
-            self.provider = "ollama"
-        
+            self.should_reason = self.model in _REASONING_MODELS
         else:
-            raise ValueError(f"Unknown provider: {provider}. Must be 'openai', 'claude', 'gemini', or 'ollama'")
+            self.should_reason = provider == "ollama" and self.model in _OLLAMA_THINKING_MODELS
+        self.provider = provider
 
-    def _convert_messages_for_claude(self, messages: List[Dict]) -> List[Dict]:
-        """Convert OpenAI format messages to Claude format."""
-        claude_messages = []
-        system_message = None
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "system":
-                system_message = content
-            elif role in ["user", "assistant"]:
-                claude_messages.append({"role": role, "content": content})
+    def warm_up(self) -> threading.Thread:
+        """
+        Open the provider connection in a background thread with a cheap listing call, so the
+        first real request doesn't pay for DNS/TCP/TLS setup. Failures are only logged.
+        """
+        self._initialize_client()
+
+        def _ping():
+            try:
+                if self.provider == "openai":
+                    self.client.models.list()
+                elif self.provider == "claude":
+                    self.claude_client.models.list(limit=1)
+                elif self.provider == "ollama":
+                    self.ollama_client.list()
+            except Exception as exc:
+                logger.debug(f"{self.provider} warm-up failed: {exc!r}")
+
+        thread = threading.Thread(target=_ping, name="llm-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _convert_messages_for_claude(self, messages: List[Dict], cache_prefix: int = 0) -> List[Dict]:
+        """
+        Convert OpenAI format messages to Claude format.
+
+        Ephemeral cache_control breakpoints go on the system prompt, on the message at index
+        cache_prefix - 1 (if set) and on the last assistant turn, so Claude can reuse the
+        static prefix and the conversation so far on the next call.
+        """
+        # one backwards scan finds the (last) system message and the last assistant turn
+        system_idx = assistant_idx = None
+        for i in range(len(messages) - 1, -1, -1):
+            role = messages[i].get("role", "user")
+            if role == "system" and system_idx is None:
+                system_idx = i
+            elif role == "assistant" and assistant_idx is None:
+                assistant_idx = i
+            if system_idx is not None and assistant_idx is not None:
+                break
+        breakpoints = {cache_prefix - 1 if cache_prefix else None, system_idx, assistant_idx}
+
+        def _content(i, content):
+            if i in breakpoints and isinstance(content, str) and content:
+                return [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+            return content
+
+        claude_messages = [
+            {"role": msg.get("role", "user"), "content": _content(i, msg.get("content", ""))}
+            for i, msg in enumerate(messages)
+            if msg.get("role", "user") in ("user", "assistant")
+        ]
+        system_message = _content(system_idx, messages[system_idx].get("content", "")) if system_idx is not None else None
         
         return claude_messages, system_message
     
+    _GEMINI_ROLES = {"user": "user", "assistant": "model"}
+
     def _convert_messages_for_gemini(self, messages: List[Dict]) -> tuple:
-        """Convert OpenAI format messages to Gemini format."""
-        gemini_messages = []
-        system_instruction = None
+        """
+        Convert OpenAI format messages to Gemini format.
+        Returns (gemini_messages, system_instruction, index of the last non-empty message or -1).
+        """
+        roles = self._GEMINI_ROLES
+        gemini_messages = [
+            {"role": roles[msg.get("role", "user")], "parts": [msg.get("content", "")]}
+            for msg in messages
+            if msg.get("role", "user") in roles
+        ]
+        system_instruction = next(
+            (msg.get("content", "") for msg in reversed(messages) if msg.get("role") == "system"), None
+        )
+        last_idx = len(gemini_messages) - 1
+        while last_idx >= 0 and not gemini_messages[last_idx]["parts"][0]:
+            last_idx -= 1
         
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "system":
-                system_instruction = content
-            elif role == "user":
-                gemini_messages.append({"role": "user", "parts": [content]})
-            elif role == "assistant":
-                gemini_messages.append({"role": "model", "parts": [content]})
+        return gemini_messages, system_instruction, last_idx
+
+    @staticmethod
+    def _stabilize_for_caching(messages: List[Dict]) -> List[Dict]:
+        """
+        Hoist system messages to the front (other turns keep their order) so the cacheable
+        prefix OpenAI matches on is the static instructions, not whatever came first.
+        """
+        if all(msg.get("role") != "system" for msg in messages[1:]):
+            return messages
+        return ([msg for msg in messages if msg.get("role") == "system"]
+                + [msg for msg in messages if msg.get("role") != "system"])
+
+    def _route(self, messages) -> str:
+        """Model to use for this request: a cheaper sibling for short ones when routing is on."""
+        if not self.enable_routing:
+            return self.model
+        size = sum(len(msg.get("content") or "") for msg in messages)
+        if size >= self.short_prompt_chars:
+            return self.model
+        if self.provider == "claude":
+            return _SMALL_CLAUDE_MODEL if ("opus" in self.model or "sonnet" in self.model) else self.model
+        return _SMALL_MODELS.get(self.model, self.model)
+
+    def _openai_params(self, messages, reasoning: str, temperature: float, max_tokens: Optional[int] = None) -> Dict:
+        params = {"model": self._route(messages), "messages": self._stabilize_for_caching(messages)}
+        if self.should_reason:
+            params["reasoning_effort"] = reasoning
+        else:
+            params["temperature"] = temperature
+            # not for reasoning models: their hidden reasoning tokens count against the cap
+            if max_tokens:
+                params["max_tokens"] = max_tokens
+        if self.cache_key:
+            # via extra_body: the pinned openai SDK predates the prompt_cache_key argument
+            params["extra_body"] = {"prompt_cache_key": self.cache_key}
+        return params
+
+    def _claude_params(self, messages, temperature: float, cache_prefix: int = 0, max_tokens: Optional[int] = None) -> Dict:
+        claude_messages, system_message = self._convert_messages_for_claude(messages, cache_prefix)
+        params = {
+            "model": self._route(messages),
+            "max_tokens": max_tokens or self.DEFAULT_MAX_TOKENS,
+            "temperature": temperature,
+            "messages": claude_messages,
+        }
+        if system_message:
+            params["system"] = system_message
+        return params
+
+    def _gemini_chat(self, messages):
+        """Start a Gemini chat over the history; returns (chat, last non-empty message) or (None, "")."""
+        gemini_messages, system_instruction, last_idx = self._convert_messages_for_gemini(messages)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Gemini messages: %r", gemini_messages)
+        
+        # Reuse the model instance for this system instruction (created on first use)
+        model = self._gemini_model(system_instruction) if system_instruction else self.gemini_client
         
-        return gemini_messages, system_instruction
+        if last_idx < 0:
+            return None, ""
+        # The last non-empty message is sent; everything before it is the chat history
+        # (trimmed in place, no copy; trailing empty messages are dropped)
+        last_message = gemini_messages[last_idx]["parts"][0]
+        del gemini_messages[last_idx:]
+        return model.start_chat(history=gemini_messages), last_message
+
+    def _response_cache_key(self, kind: str, payload, reasoning: str, temperature: float,
+                            max_tokens: Optional[int] = None) -> Optional[bytes]:
+        """Key for the response cache, or None when the call isn't deterministic (temperature > 0)."""
+        if temperature != 0:
+            return None
+        parts = [self.provider, self.model, kind, payload, reasoning, max_tokens]
+        if msgpack is not None:
+            blob = msgpack.packb(parts, use_bin_type=True, default=str)
+        else:
+            blob = json.dumps(parts, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(blob, digest_size=16).digest()
+
+    def _cache_get(self, key: Optional[bytes]) -> Optional[str]:
+        if key is None:
+            return None
+        with self._response_cache_lock:
+            value = self._response_cache.get(key)
+            if value is not None:
+                self._response_cache.move_to_end(key)
+                self.cache_stats["hits"] += 1
+            else:
+                self.cache_stats["misses"] += 1
+            return value
+
+    def _cache_put(self, key: Optional[bytes], value: Optional[str]):
+        if key is None or not value:
+            return
+        with self._response_cache_lock:
+            self._response_cache[key] = value
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+
+    def _disk_cache_path(self, prompt: str, reasoning: str, temperature: float,
+                         max_tokens: Optional[int] = None) -> Optional[str]:
+        """File for this prompt() call in cache_dir, or None when there is no disk cache."""
+        if self.cache_dir is None:
+            return None
+        blob = json.dumps([self.provider, self.model, prompt, reasoning, temperature, max_tokens])
+        return os.path.join(self.cache_dir, hashlib.sha256(blob.encode()).hexdigest())
+
+    @staticmethod
+    def _disk_get(path: Optional[str]) -> Optional[str]:
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _disk_put(self, path: Optional[str], response: Optional[str]):
+        if path is None or not response:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(response)
+            os.replace(tmp, path)  # atomic: concurrent runs never read a partial response
+        except OSError as e:
+            logger.debug(f"Could not write LLM cache entry {path}: {e}")
 
-    def action(self, messages, reasoning: str = "medium", temperature: float = 0.0):
-        """Execute an action using the selected provider."""
+    def _embed(self, text: str):
+        """Unit-norm float32 embedding of text, or None if the embedding call fails."""
+        try:
+            if self._embedding_client is None:
+                self._embedding_client = self._openai_client()
+            data = self._embedding_client.embeddings.create(model=self.EMBEDDING_MODEL, input=text).data[0].embedding
+        except Exception:
+            return None
+        vec = np.asarray(data, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+
+    def _semantic_get(self, embedding, reasoning: str) -> Optional[str]:
+        with self._response_cache_lock:
+            if not self._sem_entries:
+                return None
+            sims = self._sem_matrix[:len(self._sem_entries)] @ embedding
+            best = int(np.argmax(sims))
+            if sims[best] >= self.SEMANTIC_CACHE_THRESHOLD and self._sem_entries[best][0] == reasoning:
+                self.cache_stats["semantic_hits"] += 1
+                return self._sem_entries[best][1]
+            return None
+
+    def _semantic_put(self, embedding, reasoning: str, response: Optional[str]):
+        if not response:
+            return
+        with self._response_cache_lock:
+            if self._sem_matrix is None:
+                self._sem_matrix = np.zeros((self.SEMANTIC_CACHE_SIZE, embedding.shape[0]), dtype=np.float32)
+            slot = self._sem_next
+            self._sem_matrix[slot] = embedding
+            if slot < len(self._sem_entries):
+                self._sem_entries[slot] = (reasoning, response)  # FIFO: overwrite the oldest
+            else:
+                self._sem_entries.append((reasoning, response))
+            self._sem_next = (slot + 1) % self.SEMANTIC_CACHE_SIZE
+
+    # Callers use a handful of (temperature, max_tokens) pairs, so the per-call option
+    # objects are built once and reused; nothing mutates them after construction.
+
+    @classmethod
+    @functools.lru_cache(maxsize=32)
+    def _gemini_generation_config(cls, temperature: float, max_tokens: Optional[int] = None):
+        import google.generativeai as genai
+        return genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens or cls.DEFAULT_MAX_TOKENS,
+        )
+
+    @classmethod
+    @functools.lru_cache(maxsize=32)
+    def _ollama_options(cls, temperature: float, max_tokens: Optional[int] = None) -> Dict:
+        return {
+            "temperature": temperature,
+            "num_predict": max_tokens or cls.OLLAMA_NUM_PREDICT,
+        }
+
+    def action(self, messages, reasoning: str = "medium", temperature: float = 0.0, cache_prefix: int = 0,
+               max_tokens: Optional[int] = None):
+        """
+        Execute an action using the selected provider.
+
+        cache_prefix is the number of leading messages that stay identical across calls.
+        Claude gets an explicit cache breakpoint there; OpenAI caches stable prefixes on its own.
+        Identical temperature-0 calls are answered from an in-process LRU cache.
+        max_tokens caps the output. When None, Claude and Gemini use DEFAULT_MAX_TOKENS, Ollama
+        OLLAMA_NUM_PREDICT, and OpenAI sends no cap; OpenAI reasoning models ignore it entirely.
+        """
         self._initialize_client()  # Ensure client is initialized
+        key = self._response_cache_key("action", messages, reasoning, temperature, max_tokens)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        response = self._action_impl(messages, reasoning, temperature, cache_prefix, max_tokens)
+        self._cache_put(key, response)
+        return response
+
+    def _action_openai(self, messages, reasoning: str, temperature: float, cache_prefix: int = 0,
+                       max_tokens: Optional[int] = None):
+        response = self.client.chat.completions.create(**self._openai_params(messages, reasoning, temperature, max_tokens))
+        return response.choices[0].message.content
+
+    def _action_claude(self, messages, reasoning: str, temperature: float, cache_prefix: int = 0,
+                       max_tokens: Optional[int] = None):
+        response = self.claude_client.messages.create(**self._claude_params(messages, temperature, cache_prefix, max_tokens))
+        return response.content[0].text
+
+    def _action_gemini(self, messages, reasoning: str, temperature: float, cache_prefix: int = 0,
+                       max_tokens: Optional[int] = None):
+        chat, last_message = self._gemini_chat(messages)
+        if last_message == "":
+            return "No response from Gemini"
         
+        response = chat.send_message(
+            last_message,
+            generation_config=self._gemini_generation_config(temperature, max_tokens)
+        )
+        return response.text
+
+    def _action_ollama(self, messages, reasoning: str, temperature: float, cache_prefix: int = 0,
+                       max_tokens: Optional[int] = None):
+        logger.debug("Ollama model: %s think=%s", self.model, self.should_reason)
+        response = self.ollama_client.chat(
+            model=self.model,
+            messages=messages,
+            options=self._ollama_options(temperature, max_tokens),
+            think=self.should_reason
+        )
+        return response['message']['content']
+
+    def stream(self, messages, reasoning: str = "medium", temperature: float = 0.0,
+               cache_prefix: int = 0, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """
+        Like action(), but yield the response text as it arrives.
+
+        Every provider streams natively; join the chunks to get what action() returns.
+        Closing the generator early closes the underlying OpenAI/Claude HTTP stream.
+        """
+        self._initialize_client()  # Ensure client is initialized
+
         if self.provider == "openai":
-            if not self.should_reason:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    temperature=temperature,
-                    messages=messages,
-                )
-                return response.choices[0].message.content
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    reasoning_effort=reasoning,
-                    messages=messages,
-                )
-                return response.choices[0].message.content
-        
+            params = self._openai_params(messages, reasoning, temperature, max_tokens)
+            response = self.client.chat.completions.create(stream=True, **params)
+            try:
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                response.close()
+
         elif self.provider == "claude":
-            claude_messages, system_message = self._convert_messages_for_claude(messages)
-            params = {
-                "model": self.model,
-                "max_tokens": 4096,
-                "temperature": temperature,
-                "messages": claude_messages,
-            }
-            if system_message:
-                params["system"] = system_message
-            
-            response = self.claude_client.messages.create(**params)
-            return response.content[0].text
-        
-        elif self.provider == "gemini":  # Gemini
-            gemini_messages, system_instruction = self._convert_messages_for_gemini(messages)
-
-            print(f"================= Gemini messages: {gemini_messages}")
-            
-            # Create a new model instance with system instruction if provided
-            if system_instruction:
-                model = genai.GenerativeModel(
-                    model_name=self.model,
-                    system_instruction=system_instruction
-                )
-            else:
-                model = self.gemini_client
-            
-            # Start a chat session with history
-            chat = model.start_chat(history=gemini_messages[:-1] if len(gemini_messages) > 1 else [])
-            
-            # Send the last message
-            last_non_empty_message = ""
-            for message in reversed(gemini_messages):
-                if message["parts"] and len(message["parts"]) > 0 and message["parts"][0] != "":
-                    last_non_empty_message = message["parts"][0]
-                    break
-            last_message = last_non_empty_message
+            params = self._claude_params(messages, temperature, cache_prefix, max_tokens)
+            with self.claude_client.messages.stream(**params) as response:
+                for text in response.text_stream:
+                    yield text
 
+        elif self.provider == "gemini":
+            chat, last_message = self._gemini_chat(messages)
             if last_message == "":
-                return "No response from Gemini"
-            
+                yield "No response from Gemini"
+                return
             response = chat.send_message(
                 last_message,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=4096,
-                )
+                generation_config=self._gemini_generation_config(temperature, max_tokens),
+                stream=True,
             )
-            return response.text
-        
+            for chunk in response:
+                if chunk.parts:
+                    yield chunk.text
+
         else:  # Ollama
-            print(f"================= Ollama model: {self.model} {self.should_reason}")
             response = self.ollama_client.chat(
                 model=self.model,
                 messages=messages,
-                options={
-                    "temperature": temperature,
-                    "num_predict": 16384,
-                },
-                think=self.should_reason
+                options=self._ollama_options(temperature, max_tokens),
+                think=self.should_reason,
+                stream=True,
             )
-            return response['message']['content']
+            for chunk in response:
+                if chunk['message']['content']:
+                    yield chunk['message']['content']
+
+    def stream_prompt(self, prompt: str, reasoning: str = "medium", temperature: float = 0.2,
+                      max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Like prompt(), but yield the response text as it arrives (see stream())."""
+        return self.stream([{"role": "user", "content": prompt}], reasoning, temperature, max_tokens=max_tokens)
 
-    def prompt(self, prompt: str, reasoning: str = "medium", temperature: float = 0.2):
-        """Send a prompt using the selected provider."""
+    def prompt(self, prompt: str, reasoning: str = "medium", temperature: float = 0.2,
+               max_tokens: Optional[int] = None):
+        """Send a prompt using the selected provider (max_tokens as in action())."""
         self._initialize_client()  # Ensure client is initialized
-        
+        cached, pending = self._prompt_cache_lookup(prompt, reasoning, temperature, max_tokens)
+        if cached is not None:
+            return cached
+        response = self._prompt_impl(prompt, reasoning, temperature, max_tokens)
+        self._prompt_cache_store(pending, reasoning, response)
+        return response
+
+    def _prompt_cache_lookup(self, prompt: str, reasoning: str, temperature: float,
+                             max_tokens: Optional[int]) -> Tuple[Optional[str], Optional[Tuple]]:
+        """
+        Disk, in-process and semantic cache checks shared by prompt() and aprompt().
+
+        Returns:
+            (cached response, None) on a hit; otherwise (None, state for _prompt_cache_store)
+        """
+        disk_path = self._disk_cache_path(prompt, reasoning, temperature, max_tokens)
+        cached = self._disk_get(disk_path)
+        if cached is not None:
+            return cached, None
+        key = self._response_cache_key("prompt", prompt, reasoning, temperature, max_tokens)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached, None
+        embedding = self._embed(prompt) if key is not None and self._semantic_cache else None
+        if embedding is not None:
+            cached = self._semantic_get(embedding, reasoning)
+            if cached is not None:
+                return cached, None
+        return None, (disk_path, key, embedding)
+
+    def _prompt_cache_store(self, pending: Tuple, reasoning: str, response: Optional[str]):
+        """Fill every cache _prompt_cache_lookup missed."""
+        disk_path, key, embedding = pending
+        self._cache_put(key, response)
+        self._disk_put(disk_path, response)
+        if embedding is not None:
+            self._semantic_put(embedding, reasoning, response)
+
+    # prompt() is a single user message; only Gemini has a dedicated single-shot API
+
+    def _prompt_openai(self, prompt: str, reasoning: str, temperature: float, max_tokens: Optional[int] = None):
+        return self._action_openai([{"role": "user", "content": prompt}], reasoning, temperature, max_tokens=max_tokens)
+
+    def _prompt_claude(self, prompt: str, reasoning: str, temperature: float, max_tokens: Optional[int] = None):
+        return self._action_claude([{"role": "user", "content": prompt}], reasoning, temperature, max_tokens=max_tokens)
+
+    def _prompt_gemini(self, prompt: str, reasoning: str, temperature: float, max_tokens: Optional[int] = None):
+        response = self.gemini_client.generate_content(
+            prompt,
+            generation_config=self._gemini_generation_config(temperature, max_tokens)
+        )
+        return response.text
+
+    def _prompt_ollama(self, prompt: str, reasoning: str, temperature: float, max_tokens: Optional[int] = None):
+        return self._action_ollama([{"role": "user", "content": prompt}], reasoning, temperature, max_tokens=max_tokens)
+
+    def _initialize_async_client(self):
+        """Lazily create the async client for the selected provider (Gemini has none, see aaction())."""
+        self._initialize_client()
+        if self.provider == "openai" and self._async_client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            # SDK default pools are small; a wide batch_prompt() would queue on them.
+            # Not shared like the sync pool: an AsyncClient belongs to one event loop.
+            self._async_client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=self.MAX_RETRIES,
+                                             http_client=httpx.AsyncClient(**_http_client_options()))
+        elif self.provider == "claude" and self._async_claude_client is None:
+            import httpx
+            from anthropic import AsyncAnthropic
+            self._async_claude_client = AsyncAnthropic(api_key=CLAUDE_API_KEY, max_retries=self.MAX_RETRIES,
+                                                       http_client=httpx.AsyncClient(**_http_client_options()))
+        elif self.provider == "ollama" and self._async_ollama_client is None:
+            # The server only overlaps requests up to OLLAMA_NUM_PARALLEL (set on the server side)
+            import ollama
+            self._async_ollama_client = ollama.AsyncClient(host=OLLAMA_BASE_URL)
+
+    async def _acall_with_retries(self, fn, *args, **kwargs):
+        """Async counterpart of _call_with_retries()."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            wait = self._cooldown_remaining()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as exc:
+                if attempt == self.MAX_RETRIES or not _is_transient(exc):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, exc))
+
+    async def aaction(self, messages, reasoning: str = "medium", temperature: float = 0.0, cache_prefix: int = 0,
+                      max_tokens: Optional[int] = None):
+        """
+        Async version of action(). OpenAI, Claude and Ollama use their async clients.
+        Gemini runs the blocking call in a worker thread: its async gRPC channel is tied
+        to the first event loop it sees, and batch_prompt() starts a new loop per call.
+        """
+        self._initialize_async_client()
+        if self.provider == "gemini":
+            return await asyncio.to_thread(self.action, messages, reasoning, temperature, cache_prefix, max_tokens)
+
+        key = self._response_cache_key("action", messages, reasoning, temperature, max_tokens)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        text = await self._aaction_impl(messages, reasoning, temperature, cache_prefix, max_tokens)
+        self._cache_put(key, text)
+        return text
+
+    async def _aaction_impl(self, messages, reasoning: str, temperature: float, cache_prefix: int = 0,
+                            max_tokens: Optional[int] = None) -> str:
+        """Uncached async request to the OpenAI, Claude or Ollama async client."""
         if self.provider == "openai":
-            if not self.should_reason:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    temperature=temperature,
-                    messages=[{"role": "user", "content": prompt}],
-                )
-                return response.choices[0].message.content
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    reasoning_effort=reasoning,
-                    messages=[{"role": "user", "content": prompt}],
-                )
-                return response.choices[0].message.content
-        
+            response = await self._async_client.chat.completions.create(**self._openai_params(messages, reasoning, temperature, max_tokens))
+            text = response.choices[0].message.content
         elif self.provider == "claude":
-            response = self.claude_client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                temperature=temperature,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            return response.content[0].text
-        
-        elif self.provider == "gemini":
-            response = self.gemini_client.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=4096,
-                )
-            )
-            return response.text
-        
+            response = await self._async_claude_client.messages.create(**self._claude_params(messages, temperature, cache_prefix, max_tokens))
+            text = response.content[0].text
         else:  # Ollama
-            print(f"================= Ollama model: {self.model} {self.should_reason}")
-            response = self.ollama_client.chat(
+            response = await self._acall_with_retries(
+                self._async_ollama_client.chat,
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                options={
-                    "temperature": temperature,
-                    "num_predict": 16384,
-                },
-                think=self.should_reason
+                messages=messages,
+                options=self._ollama_options(temperature, max_tokens),
+                think=self.should_reason,
             )
-            return response['message']['content']
+            text = response['message']['content']
+        return text
+
+    async def aprompt(self, prompt: str, reasoning: str = "medium", temperature: float = 0.2,
+                      max_tokens: Optional[int] = None):
+        """Async version of prompt()."""
+        self._initialize_async_client()
+
+        if self.provider == "gemini":
+            return await asyncio.to_thread(self.prompt, prompt, reasoning, temperature, max_tokens)
+
+        # Same caches and keys as prompt(); in a thread, since the semantic check makes a blocking embedding call
+        cached, pending = await asyncio.to_thread(self._prompt_cache_lookup, prompt, reasoning, temperature, max_tokens)
+        if cached is not None:
+            return cached
+        response = await self._aaction_impl([{"role": "user", "content": prompt}], reasoning, temperature,
+                                            max_tokens=max_tokens)
+        self._prompt_cache_store(pending, reasoning, response)
+        return response
+
+    async def abatch_prompt(self, prompts: List[str], concurrency: int = 8, return_exceptions: bool = False,
+                            **kwargs) -> List[str]:
+        """
+        Run aprompt() over many prompts, at most `concurrency` in flight; results keep input order.
+        With return_exceptions, a failed prompt yields its exception instead of failing the batch.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(prompt):
+            async with semaphore:
+                return await self.aprompt(prompt, **kwargs)
+
+        return await asyncio.gather(*[_one(p) for p in prompts], return_exceptions=return_exceptions)
+
+    async def _aclose_async_clients(self):
+        for client in (self._async_client, self._async_claude_client):
+            if client is not None:
+                await client.close()
+        self._async_client = None
+        self._async_claude_client = None
+        self._async_ollama_client = None
+
+    def batch_prompt(self, prompts: List[str], concurrency: int = 8, return_exceptions: bool = False,
+                     **kwargs) -> List[str]:
+        """Blocking wrapper around abatch_prompt() for synchronous callers (bulk jobs, evals)."""
+        async def _run():
+            try:
+                return await self.abatch_prompt(prompts, concurrency=concurrency,
+                                                return_exceptions=return_exceptions, **kwargs)
+            finally:
+                # async clients are bound to this event loop, which asyncio.run closes
+                await self._aclose_async_clients()
+
+        return asyncio.run(_run())
+
+
+def _reset_after_fork():
+    """httpx pools aren't fork-safe: a child must not reuse the parent's connections."""
+    global _HTTP_CLIENT, _FORK_GENERATION
+    _HTTP_CLIENT = None
+    _FORK_GENERATION += 1
+    LLM._CLIENTS = {}
+    LLM._CLIENTS_LOCK = threading.Lock()
+    LLM._COOLDOWN_UNTIL = {}
+
 
-    
\ No newline at end of file
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
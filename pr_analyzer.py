@@ -8,7 +8,10 @@ and then uses a security-focused agent to identify potential vulnerabilities.
 import os
 import re
 import json
+import gzip
 import base64
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 from github import Github
@@ -18,6 +21,21 @@ from llm import LLM
 from logger import logger
 from colorama import Fore
 
+try:
+    import orjson
+
+    def _dump_json(obj, f):
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+except ImportError:  # optional: stdlib json is only slower on large PR reports
+    def _dump_json(obj, f):
+        f.write(json.dumps(obj, indent=2).encode())
+
+_HUNK_HEADER_RE = re.compile(r'@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+# Pattern: https://github.com/owner/repo/pull/123
+_PR_URL_RE = re.compile(r'github\.com/([^/]+)/([^/]+)/pull/(\d+)')
+# Script in an SVG: <script>, on*= event handlers, javascript: URLs
+_SVG_ACTIVE_CONTENT_RE = re.compile(r'<script|\bon[a-z]+\s*=|javascript:', re.IGNORECASE)
+
 
 class PRAnalyzer:
     """
@@ -27,9 +45,33 @@ class PRAnalyzer:
     1. Line-by-line analysis agent: Analyzes each changed line in detail
     2. Security analysis agent: Identifies security issues from the analysis
     """
+
+    # Concurrent GitHub contents requests; kept modest to stay clear of secondary rate limits
+    FETCH_WORKERS = 8
+    # Largest page GitHub serves for list endpoints (PyGithub defaults to 30)
+    FILES_PER_PAGE = 100
+    # Decoded file contents keyed by git blob SHA; content-addressed, so entries never go stale
+    BLOB_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'nullkrypt3rs', 'blobs')
+    # Line-analysis prompts in flight at once (one per changed file)
+    LINE_ANALYSIS_CONCURRENCY = 8
+    # Longer files are sent as windows of HUNK_CONTEXT_RADIUS lines around each hunk,
+    # not in full: prompt cost and latency grow with every line sent
+    FULL_CONTENT_MAX_LINES = 400
+    HUNK_CONTEXT_RADIUS = 30
+    # Changed files not worth an LLM call: lockfiles, generated code, assets, vendored trees
+    SKIP_FILENAMES = frozenset({'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock',
+                                'Pipfile.lock', 'Cargo.lock', 'Gemfile.lock', 'composer.lock', 'go.sum'})
+    SKIP_SUFFIXES = ('.lock', '.min.js', '.min.css', '.map', '_pb2.py', '.pb.go', '.pb.h', '.pb.cc',
+                     '.png', '.jpg', '.jpeg', '.gif', '.ico', '.pdf', '.zip', '.gz', '.jar',
+                     '.woff', '.woff2', '.ttf', '.eot')
+    SKIP_DIRS = ('vendor/', 'node_modules/', 'dist/')
+    # Leading whitespace is syntax here, so re-indenting is never a whitespace-only change
+    INDENT_SENSITIVE_SUFFIXES = ('.py', '.pyi', '.yml', '.yaml', 'Makefile', '.mk')
+    # Mean line length above which content is taken to be minified or generated
+    MAX_MEAN_LINE_LENGTH = 1000
     
     def __init__(self, pr_url: str, llm_model: str = "o3-mini", provider: str = "openai",
-                 github_token: Optional[str] = None):
+                 github_token: Optional[str] = None, llm_cache_dir: Optional[str] = None):
         """
         Initialize the PR Analyzer.
         
@@ -38,6 +80,8 @@ class PRAnalyzer:
             llm_model: LLM model to use (default: o3-mini)
             provider: LLM provider ('openai' or 'claude')
             github_token: GitHub personal access token (optional, uses env var if not provided)
+            llm_cache_dir: Directory to keep LLM responses in across runs (optional, for reruns
+                on the same PR while iterating on the analyzer)
         """
         self.pr_url = pr_url
         self.llm_model = llm_model
@@ -47,20 +91,29 @@ class PRAnalyzer:
         github_token = github_token or os.environ.get("GITHUB_TOKEN")
         if not github_token:
             logger.warning(f"{Fore.YELLOW}No GITHUB_TOKEN found. Some operations may be rate-limited.")
-        self.github = Github(github_token) if github_token else Github()
+        # One keep-alive connection per fetch worker. PyGithub 2.x spaces requests 0.25s apart
+        # by default, which would serialize the concurrent reads in fetch_pr_data; this
+        # analyzer never writes, so only the read throttle is lifted.
+        github_options = {"pool_size": self.FETCH_WORKERS, "seconds_between_requests": 0,
+                          "per_page": self.FILES_PER_PAGE}
+        self.github = Github(github_token, **github_options) if github_token else Github(**github_options)
         
         # Parse PR URL
         self.owner, self.repo_name, self.pr_number = self._parse_pr_url(pr_url)
         logger.info(f"{Fore.CYAN}Parsed PR: {self.owner}/{self.repo_name}#{self.pr_number}")
         
         # Initialize LLM instances for both agents
-        self.line_analyzer_llm = LLM(model=llm_model, provider=provider)
-        self.security_analyzer_llm = LLM(model=llm_model, provider=provider)
+        self.line_analyzer_llm = LLM(model=llm_model, provider=provider, cache_key="pr-line-analyzer",
+                                     cache_dir=llm_cache_dir)
+        self.security_analyzer_llm = LLM(model=llm_model, provider=provider, cache_key="pr-security-analyzer",
+                                         cache_dir=llm_cache_dir)
         
         # PR data cache
         self.pr_data = None
         self.diff_data = None
         self.file_contents = {}
+        self.file_lines = {}  # file_contents split into lines, for slicing hunk windows
+        self.skipped_files = []  # (filename, reason) left out of the line-by-line analysis
         
     def _parse_pr_url(self, url: str) -> Tuple[str, str, int]:
         """
@@ -75,9 +128,7 @@ class PRAnalyzer:
         Raises:
             ValueError: If URL format is invalid
         """
-        # Pattern: https://github.com/owner/repo/pull/123
-        pattern = r'github\.com/([^/]+)/([^/]+)/pull/(\d+)'
-        match = re.search(pattern, url)
+        match = _PR_URL_RE.search(url)
         
         if not match:
             raise ValueError(f"Invalid GitHub PR URL format: {url}")
@@ -98,7 +149,8 @@ class PRAnalyzer:
         logger.info(f"{Fore.GREEN}Fetching PR data from GitHub...")
         
         try:
-            repo = self.github.get_repo(f"{self.owner}/{self.repo_name}")
+            # lazy: only the PR is needed, so skip the GET /repos round-trip
+            repo = self.github.get_repo(f"{self.owner}/{self.repo_name}", lazy=True)
             pr = repo.get_pull(self.pr_number)
             
             # Get PR metadata
@@ -120,8 +172,8 @@ class PRAnalyzer:
             logger.info(f"{Fore.GREEN}Changed files: {self.pr_data['changed_files']}")
             logger.info(f"{Fore.GREEN}Additions: {self.pr_data['additions']}, Deletions: {self.pr_data['deletions']}")
             
-            # Get file contents for all changed files
-            files = pr.get_files()
+            # Get file contents for all changed files (materialized: it is walked more than once)
+            files = self._list_files(pr)
             
             # Build diff from file patches
             diff_parts = []
@@ -140,37 +192,15 @@ class PRAnalyzer:
                 diff_parts.append("")  # Empty line between files
             
             self.diff_data = "\n".join(diff_parts)
-            for file in files:
-                filename = file.filename
-                
-                # Get full file content from head commit
-                try:
-                    if file.status in ['added', 'modified', 'renamed']:
-                        # Get file content from head branch
-                        file_content = repo.get_contents(
-                            filename, 
-                            ref=pr.head.sha
-                        )
-                        if file_content.encoding == 'base64':
-                            self.file_contents[filename] = base64.b64decode(file_content.content).decode('utf-8')
-                        else:
-                            self.file_contents[filename] = file_content.content
-                    elif file.status == 'removed':
-                        # Try to get from base branch
-                        try:
-                            file_content = repo.get_contents(
-                                filename,
-                                ref=pr.base.sha
-                            )
-                            if file_content.encoding == 'base64':
-                                self.file_contents[filename] = base64.b64decode(file_content.content).decode('utf-8')
-                            else:
-                                self.file_contents[filename] = file_content.content
-                        except:
-                            self.file_contents[filename] = "[File was removed - content unavailable]"
-                except Exception as e:
-                    logger.warning(f"{Fore.YELLOW}Could not fetch content for {filename}: {e}")
-                    self.file_contents[filename] = "[Content unavailable]"
+
+            # One contents request per file; they are independent, so overlap the round-trips
+            head_sha, base_sha = pr.head.sha, pr.base.sha
+            with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as pool:
+                contents = pool.map(lambda f: self._fetch_file_content(repo, f, head_sha, base_sha), files)
+                for file, content in zip(files, contents):
+                    if content is not None:
+                        self.file_contents[file.filename] = content
+                        self.file_lines[file.filename] = content.splitlines()
             
             return {
                 "pr_data": self.pr_data,
@@ -183,6 +213,68 @@ class PRAnalyzer:
             logger.error(f"{Fore.RED}Error fetching PR data: {e}")
             raise
     
+    def _list_files(self, pr: PullRequest) -> List:
+        """
+        All changed files of the PR. The PR already reports how many there are, so the page
+        count is known up front and the pages are fetched concurrently instead of one by one.
+        """
+        paginated = pr.get_files()
+        pages = -(-pr.changed_files // self.FILES_PER_PAGE)
+        if pages <= 1:
+            return list(paginated)
+        with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as pool:
+            return [file for page in pool.map(paginated.get_page, range(pages)) for file in page]
+
+    @staticmethod
+    def _decode_contents(file_content) -> str:
+        if file_content.encoding == 'base64':
+            return base64.b64decode(file_content.content).decode('utf-8')
+        return file_content.content
+
+    def _get_blob(self, repo: Repository, sha: str) -> str:
+        """Decoded content of a git blob, from BLOB_CACHE_DIR when an earlier run fetched it."""
+        path = os.path.join(self.BLOB_CACHE_DIR, sha)
+        try:
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            pass
+
+        content = self._decode_contents(repo.get_git_blob(sha))
+        try:
+            os.makedirs(self.BLOB_CACHE_DIR, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.BLOB_CACHE_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp, path)  # atomic, so concurrent runs never read a partial file
+        except OSError as e:
+            logger.debug(f"Could not cache blob {sha}: {e}")
+        return content
+
+    def _fetch_file_content(self, repo: Repository, file, head_sha: str, base_sha: str) -> Optional[str]:
+        """
+        Full content of a changed file: from the head commit, or from the base commit
+        if the file was removed. Returns None for statuses that have no content to show.
+        """
+        filename = file.filename
+        try:
+            if file.status in ['added', 'modified', 'renamed']:
+                # The PR file listing already carries the head blob SHA, so go straight to the
+                # blob (no path resolution, and no 1 MB limit as with the contents API)
+                if file.sha:
+                    return self._get_blob(repo, file.sha)
+                return self._decode_contents(repo.get_contents(filename, ref=head_sha))
+            elif file.status == 'removed':
+                # Try to get from base branch
+                try:
+                    return self._decode_contents(repo.get_contents(filename, ref=base_sha))
+                except:
+                    return "[File was removed - content unavailable]"
+        except Exception as e:
+            logger.warning(f"{Fore.YELLOW}Could not fetch content for {filename}: {e}")
+            return "[Content unavailable]"
+        return None
+    
     def _parse_diff(self, diff: str) -> List[Dict]:
         """
         Parse diff into structured format with line-by-line changes.
@@ -196,27 +288,33 @@ class PRAnalyzer:
         parsed_changes = []
         current_file = None
         current_hunk = None
+        hunk_lines = None  # current_hunk["lines"].append, bound once per hunk
         line_number_old = None
         line_number_new = None
         
-        lines = diff.split('\n')
-        
-        for line in lines:
+        for line in diff.split('\n'):
+            kind = line[:1]
+
             # File header: +++ b/path/to/file
-            if line.startswith('+++ '):
+            if kind == '+' and line.startswith('+++ '):
                 if current_file:
                     parsed_changes.append(current_file)
                 current_file = {
                     "filename": line[6:].strip(),  # Remove '+++ b/'
                     "hunks": []
                 }
+                current_hunk = hunk_lines = None
                 line_number_old = None
                 line_number_new = None
+
+            # Start of the next file: its "--- a/..." header is not a deleted line
+            elif kind == 'd' and line.startswith('diff '):
+                current_hunk = hunk_lines = None
                 
             # Hunk header: @@ -old_start,old_count +new_start,new_count @@
-            elif line.startswith('@@'):
+            elif kind == '@' and line.startswith('@@'):
                 if current_file:
-                    hunk_match = re.match(r'@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@', line)
+                    hunk_match = _HUNK_HEADER_RE.match(line)
                     if hunk_match:
                         line_number_old = int(hunk_match.group(1))
                         line_number_new = int(hunk_match.group(3))
@@ -226,94 +324,161 @@ class PRAnalyzer:
                             "new_start": line_number_new,
                             "lines": []
                         }
+                        hunk_lines = current_hunk["lines"].append
                         current_file["hunks"].append(current_hunk)
                         
             # Changed lines
             elif current_hunk:
-                if line.startswith(' '):
+                if kind == ' ':
                     # Context line (unchanged)
-                    current_hunk["lines"].append({
+                    hunk_lines({
                         "type": "context",
                         "content": line[1:],
                         "old_line": line_number_old,
                         "new_line": line_number_new
                     })
-                    if line_number_old is not None:
-                        line_number_old += 1
-                    if line_number_new is not None:
-                        line_number_new += 1
-                elif line.startswith('-'):
+                    line_number_old += 1
+                    line_number_new += 1
+                elif kind == '-':
                     # Deleted line
-                    current_hunk["lines"].append({
+                    hunk_lines({
                         "type": "deleted",
                         "content": line[1:],
                         "old_line": line_number_old,
                         "new_line": None
                     })
-                    if line_number_old is not None:
-                        line_number_old += 1
-                elif line.startswith('+'):
+                    line_number_old += 1
+                elif kind == '+':
                     # Added line
-                    current_hunk["lines"].append({
+                    hunk_lines({
                         "type": "added",
                         "content": line[1:],
                         "old_line": None,
                         "new_line": line_number_new
                     })
-                    if line_number_new is not None:
-                        line_number_new += 1
+                    line_number_new += 1
         
         if current_file:
             parsed_changes.append(current_file)
         
         return parsed_changes
     
-    def analyze_line_by_line(self, parsed_changes: List[Dict]) -> List[Dict]:
+    def _skip_reason(self, file_change: Dict) -> Optional[str]:
+        """Why a changed file should not be sent to the line analyzer, or None to analyze it."""
+        filename = file_change["filename"]
+        basename = filename.rsplit('/', 1)[-1]
+        if basename in self.SKIP_FILENAMES or filename.lower().endswith(self.SKIP_SUFFIXES):
+            return "lockfile, generated or asset file"
+        if filename.startswith(self.SKIP_DIRS) or any(f"/{d}" in filename for d in self.SKIP_DIRS):
+            return "vendored or build output"
+        
+        content = self.file_contents.get(filename, "")
+        # SVGs can carry script (a common XSS vector), so only inert ones count as assets
+        active_svg = False
+        if filename.lower().endswith('.svg'):
+            added = "\n".join(line_info["content"] for hunk in file_change["hunks"]
+                              for line_info in hunk["lines"] if line_info["type"] == "added")
+            active_svg = bool(_SVG_ACTIVE_CONTENT_RE.search(content) or _SVG_ACTIVE_CONTENT_RE.search(added))
+            if not active_svg:
+                return "asset file without script"
+        if '\0' in content:
+            return "binary content"
+        lines = self.file_lines.get(filename)
+        if lines is None:
+            lines = content.splitlines()
+        # Long single-line SVG paths would look minified; scripted SVGs are analyzed regardless
+        if not active_svg and lines and len(content) / len(lines) > self.MAX_MEAN_LINE_LENGTH:
+            return "minified content"
+        
+        if not file_change["hunks"]:
+            return "no textual changes (rename, mode change or binary)"
+        if self._is_whitespace_only(file_change):
+            return "whitespace-only changes"
+        return None
+
+    def _is_whitespace_only(self, file_change: Dict) -> bool:
         """
-        Analyze each changed line using the line-by-line analysis agent.
-        
-        Args:
-            parsed_changes: Parsed diff structure
-            
-        Returns:
-            List of analysis results for each file/change
+        True when the deleted and added lines are the same, in the same order, once leading and
+        trailing whitespace is stripped (only trailing whitespace for indentation-sensitive files)
+        and blank lines are dropped. Whitespace inside a line always counts, since it can sit in a
+        string literal (SQL, shell, format strings). Moved lines don't count: reordering code can change what it does.
         """
-        logger.info(f"{Fore.GREEN}Starting line-by-line analysis...")
-        
-        analysis_results = []
-        
-        for file_change in parsed_changes:
-            filename = file_change["filename"]
-            logger.info(f"{Fore.CYAN}Analyzing file: {filename}")
-            
-            # Get full file content for context
-            file_content = self.file_contents.get(filename, "")
-            
-            # Build context for analysis
-            analysis_context = f"""
+        if file_change["filename"].endswith(self.INDENT_SENSITIVE_SUFFIXES):
+            normalize = str.rstrip
+        else:
+            normalize = str.strip
+        
+        deleted, added = [], []
+        for hunk in file_change["hunks"]:
+            for line_info in hunk["lines"]:
+                if line_info["type"] == "context":
+                    continue
+                text = normalize(line_info["content"])
+                if text:
+                    (added if line_info["type"] == "added" else deleted).append(text)
+        return deleted == added
+
+    def _hunk_windows(self, lines: List[str], hunks: List[Dict]) -> str:
+        """
+        Lines within HUNK_CONTEXT_RADIUS of each hunk (overlapping windows merged), each
+        window headed by its line range so the model can still place it in the file.
+        """
+        radius = self.HUNK_CONTEXT_RADIUS
+        windows = []
+        for hunk in hunks:
+            numbers = [line_info.get("new_line") or line_info.get("old_line") for line_info in hunk["lines"]]
+            numbers = [n for n in numbers if n] or [hunk["new_start"] or hunk["old_start"]]
+            start = max(min(numbers) - 1 - radius, 0)
+            end = min(max(numbers) + radius, len(lines))
+            if windows and start <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+        if not windows:
+            windows = [[0, self.FULL_CONTENT_MAX_LINES]]
+        
+        return "\n".join(
+            f"[lines {start + 1}-{end} of {len(lines)}]\n" + "\n".join(lines[start:end])
+            for start, end in windows
+        )
+
+    def _build_line_analysis_prompt(self, file_change: Dict) -> str:
+        """Render the line-by-line analysis prompt for one file's hunks."""
+        filename = file_change["filename"]
+        
+        # Get file content for context: all of it for small files, else the parts around the hunks
+        file_content = self.file_contents.get(filename, "")
+        lines = self.file_lines.get(filename)
+        if lines is None:
+            lines = file_content.splitlines()
+        if len(lines) <= self.FULL_CONTENT_MAX_LINES:
+            content_label = "Full File Content"
+        else:
+            content_label = "File Content (around the changes)"
+            file_content = self._hunk_windows(lines, file_change["hunks"])
+        
+        # Build context for analysis (collected in a list and joined once)
+        parts = [f"""
 File: {filename}
-Full File Content:
+{content_label}:
 {file_content}
 
 Changes in this file:
-"""
-            
-            for hunk in file_change["hunks"]:
-                analysis_context += f"\nHunk starting at line {hunk['new_start']}:\n"
-                for line_info in hunk["lines"]:
-                    line_type = line_info["type"]
-                    content = line_info["content"]
+"""]
+        add = parts.append
+        markers = {"added": "  + ", "deleted": "  - ", "context": "    "}
+        
+        for hunk in file_change["hunks"]:
+            add(f"\nHunk starting at line {hunk['new_start']}:\n")
+            for line_info in hunk["lines"]:
+                marker = markers.get(line_info["type"])
+                if marker is not None:
                     line_num = line_info.get("new_line") or line_info.get("old_line")
-                    
-                    if line_type == "added":
-                        analysis_context += f"  + Line {line_num}: {content}\n"
-                    elif line_type == "deleted":
-                        analysis_context += f"  - Line {line_num}: {content}\n"
-                    elif line_type == "context":
-                        analysis_context += f"    Line {line_num}: {content}\n"
-            
-            # Create prompt for line-by-line analysis
-            line_analysis_prompt = f"""
+                    add(f"{marker}Line {line_num}: {line_info['content']}\n")
+        analysis_context = "".join(parts)
+        
+        # Create prompt for line-by-line analysis
+        line_analysis_prompt = f"""
 You are a code review expert. Analyze the following code changes line by line.
 
 {analysis_context}
@@ -326,23 +491,54 @@ For each changed line (marked with + or -), provide:
 
 Be thorough and specific. Focus on understanding the intent and context of each change.
 """
+        return line_analysis_prompt
+
+    def analyze_line_by_line(self, parsed_changes: List[Dict]) -> List[Dict]:
+        """
+        Analyze each changed line using the line-by-line analysis agent.
+        
+        Args:
+            parsed_changes: Parsed diff structure
             
-            # Get analysis from line analyzer agent
-            try:
-                analysis = self.line_analyzer_llm.prompt(line_analysis_prompt, temperature=0.2)
-                analysis_results.append({
-                    "filename": filename,
-                    "analysis": analysis,
-                    "changes": file_change
-                })
+        Returns:
+            List of analysis results for each file/change
+        """
+        logger.info(f"{Fore.GREEN}Starting line-by-line analysis...")
+        
+        self.skipped_files = []
+        to_analyze = []
+        for file_change in parsed_changes:
+            reason = self._skip_reason(file_change)
+            if reason:
+                logger.info(f"{Fore.YELLOW}Skipping {file_change['filename']}: {reason}")
+                self.skipped_files.append((file_change["filename"], reason))
+            else:
+                to_analyze.append(file_change)
+        parsed_changes = to_analyze
+        
+        prompts = []
+        for file_change in parsed_changes:
+            logger.info(f"{Fore.CYAN}Analyzing file: {file_change['filename']}")
+            prompts.append(self._build_line_analysis_prompt(file_change))
+        
+        # Files are analyzed independently, so the requests run concurrently
+        analyses = self.line_analyzer_llm.batch_prompt(
+            prompts, concurrency=self.LINE_ANALYSIS_CONCURRENCY, return_exceptions=True, temperature=0.2
+        )
+        
+        analysis_results = []
+        for file_change, analysis in zip(parsed_changes, analyses):
+            filename = file_change["filename"]
+            if isinstance(analysis, BaseException):
+                logger.error(f"{Fore.RED}Error analyzing {filename}: {analysis}")
+                analysis = f"Error during analysis: {str(analysis)}"
+            else:
                 logger.info(f"{Fore.GREEN}Completed analysis for {filename}")
-            except Exception as e:
-                logger.error(f"{Fore.RED}Error analyzing {filename}: {e}")
-                analysis_results.append({
-                    "filename": filename,
-                    "analysis": f"Error during analysis: {str(e)}",
-                    "changes": file_change
-                })
+            analysis_results.append({
+                "filename": filename,
+                "analysis": analysis,
+                "changes": file_change
+            })
         
         return analysis_results
     
@@ -367,11 +563,11 @@ PR Author: {self.pr_data['author']}
 Line-by-line analysis results:
 """
         
-        for analysis_result in line_analyses:
-            security_context += f"\n{'='*60}\n"
-            security_context += f"File: {analysis_result['filename']}\n"
-            security_context += f"{'='*60}\n"
-            security_context += f"{analysis_result['analysis']}\n"
+        rule = '=' * 60
+        security_context += "".join(
+            f"\n{rule}\nFile: {analysis_result['filename']}\n{rule}\n{analysis_result['analysis']}\n"
+            for analysis_result in line_analyses
+        )
         
         # Create security analysis prompt
         security_prompt = f"""
@@ -417,6 +613,7 @@ Provide a comprehensive security analysis report in a structured format.
                 "line_analyses": line_analyses,
                 "summary": {
                     "files_analyzed": len(line_analyses),
+                    "files_skipped": [{"filename": name, "reason": reason} for name, reason in self.skipped_files],
                     "total_changes": self.pr_data['additions'] + self.pr_data['deletions']
                 }
             }
@@ -446,21 +643,35 @@ Provide a comprehensive security analysis report in a structured format.
         
         return security_results
     
-    def save_results(self, results: Dict, output_file: str = "pr_security_analysis.json"):
+    def save_results(self, results: Dict, output_file: str = "pr_security_analysis.json", full: bool = False):
         """
         Save analysis results to a JSON file.
         
+        The per-file "changes" (every parsed line of every hunk) are left out of it: on big PRs
+        they are most of the size, and they can be rebuilt from the PR itself.
+        
         Args:
             results: Analysis results dictionary
             output_file: Output file path
+            full: Also write the complete results, changes included, gzipped next to output_file
         """
         output_path = os.path.join("results", output_file)
         os.makedirs("results", exist_ok=True)
         
-        with open(output_path, 'w') as f:
-            json.dump(results, f, indent=2)
+        slim = dict(results, line_analyses=[
+            {key: value for key, value in analysis.items() if key != "changes"}
+            for analysis in results.get("line_analyses", [])
+        ])
+        with open(output_path, 'wb') as f:
+            _dump_json(slim, f)
         
         logger.info(f"{Fore.GREEN}Results saved to {output_path}")
+        
+        if full:
+            full_path = os.path.splitext(output_path)[0] + ".full.json.gz"
+            with gzip.open(full_path, 'wb') as f:
+                _dump_json(results, f)
+            logger.info(f"{Fore.GREEN}Full results saved to {full_path}")
 
 
 def main():
@@ -477,6 +688,10 @@ def main():
     parser.add_argument("-o", "--output", default="pr_security_analysis.json",
                        help="Output file name")
     parser.add_argument("-t", "--token", help="GitHub personal access token (or set GITHUB_TOKEN env var)")
+    parser.add_argument("--full", action="store_true",
+                       help="Also save the full results, including every parsed diff line, as <output>.full.json.gz")
+    parser.add_argument("--llm-cache", metavar="DIR",
+                       help="Reuse LLM responses stored in DIR by earlier runs (for development reruns)")
     
     args = parser.parse_args()
     
@@ -485,14 +700,15 @@ def main():
         pr_url=args.pr_url,
         llm_model=args.model,
         provider=args.provider,
-        github_token=args.token
+        github_token=args.token,
+        llm_cache_dir=args.llm_cache
     )
     
     # Run analysis
     results = analyzer.analyze()
     
     # Save results
-    analyzer.save_results(results, args.output)
+    analyzer.save_results(results, args.output, full=args.full)
     
     # Print summary
     print(f"\n{Fore.GREEN}{'='*60}")
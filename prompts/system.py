@@ -1,3 +1,6 @@
+import functools
+import re
+
 # Language-specific knowledge bases
 LANGUAGE_EXPERTISE = {
     'c': """C programming language:
@@ -133,6 +136,24 @@ SYSTEM_PROMPT_TEMPLATE = """
 {tools_section}
 """
 
+# The literals above are indented to match the source layout. Strip that once here so the
+# padding isn't sent (and billed as tokens) with every request; relative indentation is kept.
+_SOURCE_INDENT_RE = re.compile(r'^ {1,8}', re.MULTILINE)
+LANGUAGE_EXPERTISE = {lang: _SOURCE_INDENT_RE.sub('', text) for lang, text in LANGUAGE_EXPERTISE.items()}
+TOOLS_SECTION = _SOURCE_INDENT_RE.sub('', TOOLS_SECTION)
+SYSTEM_PROMPT_TEMPLATE = _SOURCE_INDENT_RE.sub('', SYSTEM_PROMPT_TEMPLATE)
+
+_LANGUAGE_NAMES = {
+    'c': 'C',
+    'cpp': 'C++',
+    'python': 'Python',
+    'rust': 'Rust',
+    'go': 'Go',
+    'java': 'Java',
+}
+
+
+@functools.lru_cache(maxsize=32)
 def get_system_prompt(language: str = 'c', file: str = '', binary_path: str = '') -> str:
     """
     Get language-specific system prompt.
@@ -145,16 +166,7 @@ def get_system_prompt(language: str = 'c', file: str = '', binary_path: str = ''
     Returns:
         Formatted system prompt string
     """
-    language_names = {
-        'c': 'C',
-        'cpp': 'C++',
-        'python': 'Python',
-        'rust': 'Rust',
-        'go': 'Go',
-        'java': 'Java',
-    }
-    
-    language_name = language_names.get(language, 'C/C++')
+    language_name = _LANGUAGE_NAMES.get(language, 'C/C++')
     language_expertise = LANGUAGE_EXPERTISE.get(language, LANGUAGE_EXPERTISE['c'])
     tools_section = TOOLS_SECTION.format(file=file, binary_path=binary_path, language_name=language_name)
     
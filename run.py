@@ -1,15 +1,25 @@
 import os
+import sys
+import stat
 import argparse
+import functools
 from scripter import ScriptRunner
 from code_browser import CodeBrowser
 from debugger import Debugger
 from agent import Agent
 from queue import Queue
 from logger import logger
+from utils import read_source
 from colorama import Fore, Style
 
-def print_banner():
-    banner = """
+# Accepted --llm-model / --provider values; tuples so --help lists them in a stable order
+LLM_MODELS = ("gemini-2.5-pro", "gpt-3.5-turbo", "gpt-4o", "gpt-4o-mini", "o3-mini", "o1-preview",
+              "claude-3-5-haiku-20241022", "claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-3-haiku-20240307",
+              "qwen3:235b", "qwen3-coder:480b", "qwen3-coder:30b")
+PROVIDERS = ("openai", "claude", "gemini", "ollama")
+
+# Printed once at startup; the trailing newline matches the old print()
+_BANNER = """
     ╔══════════════════════════════════════════════════════════════════════╗
     ║                                                                      ║
     ║             Baby Naptime - LLMs for Native Vulnerabilities           ║
@@ -24,8 +34,11 @@ def print_banner():
     ║               -- Find bugs while the baby's sleeping! --             ║
     ║                                                                      ║
     ╚══════════════════════════════════════════════════════════════════════╝
-    """
-    print(banner)
+    """ + "\n"
+
+def print_banner():
+    sys.stdout.write(_BANNER)
+    sys.stdout.flush()
 
 class BabyNaptime:
     def __init__(self, code_file: str, max_iterations: int = 100, 
@@ -51,28 +64,23 @@ class BabyNaptime:
         self.provider = provider
         self.code_browser = CodeBrowser(llm_model=llm_model, provider=provider)
         
-        if not os.path.exists(code_file):
-            raise FileNotFoundError(f"Source file not found: {code_file}")
-            
-        # self.file_contents = open(self.code_file, 'r').read()
-        if not self.is_binary_file(code_file):
+        # Shared with the code browser, so the entry-function lookup reuses this read
+        try:
+            self.is_binary = read_source(code_file)[0]
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Source file not found: {code_file}") from None
+
+        if not self.is_binary:
             logger.info(f"Reading source file: {code_file}")
-            self.file_contents = open(self.code_file, 'r').read()
-            self.is_binary = False
         else:
             logger.warning(f"Skipping text read for binary file: {code_file}")
-            self.file_contents = "the path of binary file is"+self.code_file
-            self.is_binary = True
 
-    def is_binary_file(self, file_path):
-        """Check if the given file is a binary file by checking for null bytes."""
-        try:
-            with open(file_path, 'rb') as f:
-                data = f.read(1024)
-                return b'\x00' in data
-        except Exception as e:
-            logger.error(f"Error checking file type: {e}")
-            return False
+    @functools.cached_property
+    def file_contents(self) -> str:
+        """Source text of the target, built on first use from the shared read cache."""
+        if self.is_binary:
+            return "the path of binary file is"+self.code_file
+        return read_source(self.code_file)[1]
         
     def run(self):
         """Run the vulnerability analysis on the target code."""
@@ -128,15 +136,14 @@ def main():
         "--llm-model", "-l",
         help="LLM model to use for analysis",
         default="o3-mini",
-        choices=["gemini-2.5-pro","gpt-3.5-turbo", "gpt-4o", "gpt-4o-mini", "o3-mini", "o1-preview", 
-                 "claude-3-5-haiku-20241022", "claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-3-haiku-20240307", "qwen3:235b", "qwen3-coder:480b", "qwen3-coder:30b"]
+        choices=LLM_MODELS
     )
     
     parser.add_argument(
         "--provider", "-p",
         help="LLM provider to use",
         default="openai",
-        choices=["openai", "claude", "gemini", "ollama"]
+        choices=PROVIDERS
     )
     
     parser.add_argument(
@@ -159,20 +166,21 @@ def main():
         logger.error("Keep history must be greater than 10")
         return 1
 
-    # Check if code file exists
-    if not os.path.exists(args.code_file):
-        logger.error(f"File not found: {args.code_file}")
-        return 1
-
-    # Check if code directory exists
-    if not os.path.exists(args.code_directory):
-        logger.error(f"Code directory not found: {args.code_directory}")
-        return 1
-
-    # Check if code directory is actually a directory
-    if not os.path.isdir(args.code_directory):
-        logger.error(f"Specified path is not a directory: {args.code_directory}")
-        return 1
+    # Check the code file and directory with one stat each
+    preflight = (
+        (args.code_file, f"File not found: {args.code_file}", None),
+        (args.code_directory, f"Code directory not found: {args.code_directory}",
+         f"Specified path is not a directory: {args.code_directory}"),
+    )
+    for path, missing_error, not_dir_error in preflight:
+        try:
+            st = os.stat(path)
+        except OSError:
+            logger.error(missing_error)
+            return 1
+        if not_dir_error and not stat.S_ISDIR(st.st_mode):
+            logger.error(not_dir_error)
+            return 1
 
     analyzer = BabyNaptime(
             code_file=args.code_file,
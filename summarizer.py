@@ -51,5 +51,6 @@ class Summarizer:
         Keep the summary focused on technical details and actual actions taken. Each bullet point should be 1-2 sentences max. Keep the overall summary short.
         """
 
-        output = self.llm.prompt(prompt)
+        # summaries are asked to stay short; cap the output so a rambling one can't stall the loop
+        output = self.llm.prompt(prompt, max_tokens=1024)
         return "To reduce context, here is a summary of the previous part of the conversation:\n" + output
@@ -7,24 +7,34 @@
 # print([m.id for m in models.data])
 
 import os
-import json
-import urllib.request
-import urllib.error
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 API_KEY = os.getenv("GEMINI_API_KEY")
 if not API_KEY:
     raise ValueError("Please set GEMINI_API_KEY environment variable")
 
-url = f"https://generativelanguage.googleapis.com/v1beta/models?key={API_KEY}"
+url = "https://generativelanguage.googleapis.com/v1beta/models"
+
+# One keep-alive session for every page, retrying transient failures on the same pool
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_maxsize=4, max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))))
 
 try:
-    with urllib.request.urlopen(url) as response:
-        if response.status != 200:
-            raise RuntimeError(f"Request failed with status {response.status}")
-        data = json.loads(response.read().decode("utf-8"))
+    models = []
+    params = {"key": API_KEY, "pageSize": 1000}
+    while True:
+        response = session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        models.extend(data.get("models", []))
+        if not data.get("nextPageToken"):
+            break
+        params["pageToken"] = data["nextPageToken"]
 
     print("Available Gemini models:")
-    for model in data.get("models", []):
+    for model in models:
         name = model.get("name")
         display_name = model.get("displayName", "")
         description = model.get("description", "")
@@ -35,9 +45,9 @@ try:
             print(f"  Description: {description}")
         print()
 
-except urllib.error.HTTPError as e:
-    print("HTTP Error:", e.code, e.reason)
-except urllib.error.URLError as e:
-    print("Connection Error:", e.reason)
+except requests.exceptions.HTTPError as e:
+    print("HTTP Error:", e.response.status_code, e.response.reason)
+except requests.exceptions.ConnectionError as e:
+    print("Connection Error:", e)
 except Exception as e:
     print("Unexpected error:", e)
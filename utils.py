@@ -1,6 +1,66 @@
+import io
+import os
+import re
+import hashlib
+import functools
 import tiktoken
 from typing import Union, List, Dict
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Comprehensive list of dangerous shell commands and patterns that could harm the system
+DANGEROUS_PATTERNS = (
+    'rm -rf /',      # Delete root directory
+    'rm -rf *',      # Delete all in current dir
+    'rm -rf ~',      # Delete home directory
+    'mkfs',          # Format filesystem
+    'dd if=/dev/zero',
+    '> /dev/sda',    # Overwrite disk
+    ':(){:|:&};:',   # Fork bomb
+    'chmod -R 777 /', # Recursive permission change on root
+    'chmod -R 000 /',
+    '> /etc/passwd', # Overwrite critical system files
+    '> /etc/shadow',
+    'shutdown',      # System control commands
+    'reboot',
+    'halt',
+    'poweroff',
+    'init 0',
+    'init 6',
+    'format',
+    'fdisk',
+    '> /etc/hosts',
+    '> /etc/resolv.conf',
+    'mv /* /dev/null',
+    'dd if=/dev/random',
+    'dd if=/dev/urandom',
+    ':(){ :|:& };:', # Alternative fork bomb
+    '> /boot',       # Delete critical directories
+    'rm -rf /boot',
+    'rm -rf /etc',
+    'rm -rf /usr', 
+    'rm -rf /var',
+    'rm -rf /lib',
+    'rm -rf /bin',
+    'rm -rf /sbin',
+    'chown -R',      # Recursive ownership change
+    'chmod -R'
+)
+
+# All patterns in one alternation, so a command is scanned once rather than once per pattern.
+# Matched case-insensitively against the command as given, with no lowercased copy.
+# Commands were always compared lowercased, so mixed-case entries like 'chmod -R' never
+# matched; they stay out of the regex to keep those verdicts (ordinary 'chmod -R 755 dir').
+_DANGEROUS_RE = re.compile(
+    "|".join(re.escape(pattern) for pattern in DANGEROUS_PATTERNS if pattern == pattern.lower()),
+    re.IGNORECASE,
+)
+
+
+@functools.lru_cache(maxsize=256)
 def sanitize_command(command: str) -> str:
     """
     Sanitize a shell command by checking against a blacklist of dangerous patterns.
@@ -14,57 +74,98 @@ def sanitize_command(command: str) -> str:
     Raises:
         ValueError: If the command contains any dangerous patterns
     """
-    # Comprehensive list of dangerous shell commands and patterns that could harm the system
-    DANGEROUS_PATTERNS = [
-        'rm -rf /',      # Delete root directory
-        'rm -rf *',      # Delete all in current dir
-        'rm -rf ~',      # Delete home directory
-        'mkfs',          # Format filesystem
-        'dd if=/dev/zero',
-        '> /dev/sda',    # Overwrite disk
-        ':(){:|:&};:',   # Fork bomb
-        'chmod -R 777 /', # Recursive permission change on root
-        'chmod -R 000 /',
-        '> /etc/passwd', # Overwrite critical system files
-        '> /etc/shadow',
-        'shutdown',      # System control commands
-        'reboot',
-        'halt',
-        'poweroff',
-        'init 0',
-        'init 6',
-        'format',
-        'fdisk',
-        '> /etc/hosts',
-        '> /etc/resolv.conf',
-        'mv /* /dev/null',
-        'dd if=/dev/random',
-        'dd if=/dev/urandom',
-        ':(){ :|:& };:', # Alternative fork bomb
-        '> /boot',       # Delete critical directories
-        'rm -rf /boot',
-        'rm -rf /etc',
-        'rm -rf /usr', 
-        'rm -rf /var',
-        'rm -rf /lib',
-        'rm -rf /bin',
-        'rm -rf /sbin',
-        'chown -R',      # Recursive ownership change
-        'chmod -R'
-    ]
-    
-    # Preserve original command but check lowercase version
-    original_command = command
-    command_lower = command.lower().strip()
-    
     # Check command against blacklist
-    for pattern in DANGEROUS_PATTERNS:
-        if pattern in command_lower:
-            raise ValueError(
-                f"Command '{command}' contains dangerous pattern '{pattern}'"
-            )
+    match = _DANGEROUS_RE.search(command)
+    if match:
+        raise ValueError(
+            f"Command '{command}' contains dangerous pattern '{match.group(0)}'"
+        )
             
-    return original_command
+    return command
+
+@functools.lru_cache(maxsize=256)
+def _read_source_cached(path: str, mtime_ns: int, size: int):
+    # mtime_ns and size are part of the key, so an edited file misses the cache.
+    # Read straight into one buffer of the stat'd size: no growth or head+rest copy.
+    buf = bytearray(size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        n = f.readinto(view[:1024])
+        if buf.find(b'\x00', 0, n) != -1:
+            return True, None, None, None
+        while n < size:
+            got = f.readinto(view[n:])
+            if not got:
+                break
+            n += got
+    # same result as a text-mode read: UTF-8 with universal newlines
+    text = str(view[:n], 'utf-8', 'replace').replace('\r\n', '\n').replace('\r', '\n')
+    # Content key for parse caches; not a security hash, so take xxh3 when it's installed
+    if xxhash is not None:
+        digest = xxhash.xxh3_64_hexdigest(view[:n])
+    else:
+        digest = hashlib.blake2b(view[:n], digest_size=16).hexdigest()
+    return False, text, tuple(io.StringIO(text).readlines()), digest
+
+def read_source(file_path: str):
+    """
+    Read a source file once per change, shared by everything that needs its text.
+
+    Files with a NUL byte in their first 1024 bytes are treated as binary and only
+    that header is read.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Tuple of (is_binary, text, lines with line endings); text and lines are None for binaries
+    """
+    st = os.stat(file_path)
+    return _read_source_cached(os.path.abspath(file_path), st.st_mtime_ns, st.st_size)[:3]
+
+def source_digest(file_path: str):
+    """
+    Hash of a source file's bytes, from the same cached read as read_source.
+
+    Keys caches on content rather than mtime, so touching or regenerating a file
+    without changing it still hits.
+
+    Returns:
+        Hex digest string, or None for binary files
+    """
+    st = os.stat(file_path)
+    return _read_source_cached(os.path.abspath(file_path), st.st_mtime_ns, st.st_size)[3]
+
+# Language mapping based on file extensions
+_EXTENSION_MAP = {
+    '.c': 'c',
+    '.cpp': 'cpp',
+    '.cxx': 'cpp',
+    '.cc': 'cpp',
+    '.c++': 'cpp',
+    '.h': 'c',  # Default header files to C
+    '.hpp': 'cpp',
+    '.hxx': 'cpp',
+    '.py': 'python',
+    '.rs': 'rust',
+    '.go': 'go',
+    '.java': 'java',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+}
+
+# Content signatures, found in one case-insensitive pass over the sniff window
+_LANGUAGE_SNIFF_RE = re.compile(
+    r'(?P<go>package main|import \()'
+    r'|(?P<rust>fn main|#!\[allow)'
+    r'|(?P<python>def |import )'
+    r'|(?P<java>public class|public static void main)'
+    r'|(?P<include>#include)'
+    r'|(?P<namespace>namespace)',
+    re.IGNORECASE,
+)
+# Precedence when several signatures appear, checked first to last
+_SNIFF_PRECEDENCE = ('go', 'rust', 'python', 'java')
 
 def detect_language(file_path: str, file_contents: str = None) -> str:
     """
@@ -77,52 +178,32 @@ def detect_language(file_path: str, file_contents: str = None) -> str:
     Returns:
         String identifier for the language (e.g., 'c', 'cpp', 'python', 'rust', 'go', 'java')
     """
-    import os
-    
-    # Language mapping based on file extensions
-    extension_map = {
-        '.c': 'c',
-        '.cpp': 'cpp',
-        '.cxx': 'cpp',
-        '.cc': 'cpp',
-        '.c++': 'cpp',
-        '.h': 'c',  # Default header files to C
-        '.hpp': 'cpp',
-        '.hxx': 'cpp',
-        '.py': 'python',
-        '.rs': 'rust',
-        '.go': 'go',
-        '.java': 'java',
-        '.js': 'javascript',
-        '.ts': 'typescript',
-    }
-    
-    # Get file extension
-    _, ext = os.path.splitext(file_path.lower())
-    
-    if ext in extension_map:
-        return extension_map[ext]
+    # Only the extension needs lowercasing, not the whole path
+    lang = _EXTENSION_MAP.get(os.path.splitext(file_path)[1].lower())
+    if lang:
+        return lang
     
     # If no extension match, try to detect from content
     if file_contents:
         # Check for common language signatures
-        content_lower = file_contents.lower()[:500]  # Check first 500 chars
-        if 'package main' in content_lower or 'import (' in content_lower:
-            return 'go'
-        elif 'fn main' in content_lower or '#![allow' in content_lower:
-            return 'rust'
-        elif 'def ' in content_lower or 'import ' in content_lower:
-            return 'python'
-        elif 'public class' in content_lower or 'public static void main' in content_lower:
-            return 'java'
-        elif '#include' in content_lower and 'namespace' in content_lower:
-            return 'cpp'
-        elif '#include' in content_lower:
-            return 'c'
+        found = {m.lastgroup for m in _LANGUAGE_SNIFF_RE.finditer(file_contents, 0, 500)}  # Check first 500 chars
+        for lang in _SNIFF_PRECEDENCE:
+            if lang in found:
+                return lang
+        if 'include' in found:
+            return 'cpp' if 'namespace' in found else 'c'
     
     # Default to C/C++ for binary analysis context
     return 'c'
 
+@functools.lru_cache(maxsize=8)
+def _get_encoder(model: str):
+    """tiktoken encoder for model (o200k_base if tiktoken doesn't know it), built once per model."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
 def count_tokens(text: Union[str, List[Dict[str, str]]], model: str = "gpt-4o") -> int:
     """
     Count the number of tokens in a text string using OpenAI's tokenizer.
@@ -140,12 +221,15 @@ def count_tokens(text: Union[str, List[Dict[str, str]]], model: str = "gpt-4o")
         >>> count_tokens([{"content": "Hello"}, {"content": "world!"}])
         2
     """
-    # Convert list of messages to single string if needed
-    if isinstance(text, list):
-        text = " ".join(str(item.get("content", "")) for item in text)
-    
     # Get tokenizer for specified model
-    encoder = tiktoken.encoding_for_model("gpt-4o")
-    tokens = encoder.encode(text)
+    encoder = _get_encoder(model)
+    
+    # Plain content accounting: encode_ordinary skips the special-token checks (and doesn't
+    # raise on text that happens to contain "<|endoftext|>")
+    if isinstance(text, list):
+        # Messages are tokenized separately, in parallel on tiktoken's threads, instead of
+        # being joined into one large string first
+        batches = encoder.encode_ordinary_batch([str(item.get("content", "")) for item in text])
+        return sum(len(tokens) for tokens in batches)
     
-    return len(tokens)
\ No newline at end of file
+    return len(encoder.encode_ordinary(text))
\ No newline at end of file